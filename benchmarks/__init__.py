@@ -0,0 +1,3 @@
+"""
+Performance benchmarks of coeur, run with `python -m benchmarks.run --help`.
+"""
@@ -0,0 +1,181 @@
+"""
+Synthetic corpus generator: a coeur project with N posts (Markdown and HTML, log-normal sizes,
+SEO variations) spread over several `dbN.sqlite` shards, always the same for a given seed.
+"""
+
+import json
+import math
+import os
+import random
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut "
+    "labore et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris "
+    "nisi aliquip ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse "
+    "cillum fugiat nulla pariatur excepteur sint occaecat cupidatat non proident sunt culpa qui "
+    "officia deserunt mollit anim id est laborum paris coeur static site blog travel city guide"
+).split()
+
+
+class CorpusGenerator:
+    FIRST_DATE = datetime(2019, 1, 1)
+    COLUMNS = ("uuid", "title", "content", "content_format", "path", "extra", "date", "image", "db")
+
+    def __init__(
+        self,
+        posts: int = 10000,
+        shards: int = 4,
+        seed: int = 42,
+        markdown_ratio: float = 0.7,
+        median_size: int = 4000,
+        seo_variations: tuple = ("amp", "print"),
+    ):
+        self.posts = posts
+        self.shards = max(shards, 1)
+        self.seed = seed
+        self.markdown_ratio = markdown_ratio
+        self.median_size = median_size
+        self.seo_variations = list(seo_variations)
+
+    def params(self) -> dict:
+        return {
+            "posts": self.posts,
+            "shards": self.shards,
+            "seed": self.seed,
+            "markdown_ratio": self.markdown_ratio,
+            "median_size": self.median_size,
+            "seo_variations": self.seo_variations,
+        }
+
+    def create(self, name: str) -> str:
+        """Create the project folder `name` in the current directory, returning its path."""
+        from coeur.apps.ssg.bootstrap import CreateHandler
+
+        CreateHandler(name)
+        self._set_seo_variations(os.path.join(name, "config.toml"))
+
+        cwd = os.getcwd()
+        os.chdir(name)
+        try:
+            self.populate()
+        finally:
+            os.chdir(cwd)
+        return os.path.abspath(name)
+
+    def populate(self) -> None:
+        """Add the posts to the project in the current directory, creating missing shards."""
+        from coeur.apps.ssg.db import ShardingManager
+
+        while len(ShardingManager.get_databases()) < self.shards:
+            ShardingManager.create_new_database()
+
+        rows = {shard: [] for shard in range(1, self.shards + 1)}
+        for index, post in enumerate(self.generate_posts()):
+            shard = index % self.shards + 1
+            rows[shard].append(tuple({**post, "db": shard}[column] for column in self.COLUMNS))
+
+        for shard, shard_rows in rows.items():
+            conn = sqlite3.connect(f"db/db{shard}.sqlite")
+            try:
+                conn.executemany(
+                    f"INSERT INTO posts ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    shard_rows,
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def generate_posts(self):
+        rng = random.Random(self.seed)
+        for index in range(self.posts):
+            title = self.sentence(rng, rng.randint(3, 9)).rstrip(".")
+            markdown = rng.random() < self.markdown_ratio
+            size = self.content_size(rng)
+            date = self.FIRST_DATE + timedelta(minutes=rng.randint(0, 6 * 365 * 24 * 60))
+            extra = None
+            if rng.random() < 0.5:
+                extra = json.dumps(
+                    {"description": self.sentence(rng, 20), "tags": rng.sample(WORDS, 3)}
+                )
+            yield {
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "title": title,
+                "content": self.markdown(rng, size) if markdown else self.html(rng, size),
+                "content_format": "md" if markdown else "html",
+                "path": f"/posts/{'-'.join(title.lower().split()[:5])}-{index}/",
+                "extra": extra,
+                # a few undated posts, like imports without front matter dates
+                "date": None if rng.random() < 0.01 else date.strftime("%Y-%m-%dT%H:%M:%S"),
+                "image": f"/img/{index % 50}.jpg" if rng.random() < 0.8 else None,
+            }
+
+    def write_markdown(self, directory: str, count: int) -> None:
+        """Write `count` Zola-style `index.md` files, input of the Markdown import."""
+        rng = random.Random(self.seed)
+        for index in range(count):
+            title = self.sentence(rng, rng.randint(3, 9)).rstrip(".")
+            date = self.FIRST_DATE + timedelta(days=rng.randint(0, 6 * 365))
+            folder = os.path.join(directory, f"post-{index}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, "index.md"), "w") as file:
+                file.write(
+                    f'---\ntitle: "{title}"\ndate: {date:%Y-%m-%d}\n'
+                    f"extra:\n  image: /img/{index % 50}.jpg\n---\n"
+                    f"{self.markdown(rng, self.content_size(rng))}"
+                )
+
+    def content_size(self, rng: random.Random) -> int:
+        return int(min(max(rng.lognormvariate(math.log(self.median_size), 0.8), 300), 80000))
+
+    @staticmethod
+    def sentence(rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def paragraph(self, rng: random.Random) -> str:
+        return " ".join(self.sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 6)))
+
+    def markdown(self, rng: random.Random, size: int) -> str:
+        blocks = []
+        length = 0
+        while length < size:
+            kind = rng.random()
+            if kind < 0.15:
+                block = f"## {self.sentence(rng, 4).rstrip('.')}"
+            elif kind < 0.25:
+                block = "\n".join(f"- {self.sentence(rng, 6)}" for _ in range(rng.randint(2, 6)))
+            elif kind < 0.3:
+                block = f"```python\nprint({self.sentence(rng, 5)!r})\n```"
+            else:
+                block = self.paragraph(rng)
+                if rng.random() < 0.3:
+                    block += f" See [{rng.choice(WORDS)}](https://example.com/{rng.choice(WORDS)})."
+            blocks.append(block)
+            length += len(block) + 2
+        return "\n\n".join(blocks)
+
+    def html(self, rng: random.Random, size: int) -> str:
+        blocks = []
+        length = 0
+        while length < size:
+            kind = rng.random()
+            if kind < 0.15:
+                block = f"<h2>{self.sentence(rng, 4).rstrip('.')}</h2>"
+            elif kind < 0.25:
+                items = "".join(f"<li>{self.sentence(rng, 6)}</li>" for _ in range(3))
+                block = f"<ul>{items}</ul>"
+            else:
+                block = f"<p>{self.paragraph(rng)}</p>"
+            blocks.append(block)
+            length += len(block) + 1
+        return "\n".join(blocks)
+
+    def _set_seo_variations(self, config_path: str) -> None:
+        with open(config_path) as file:
+            config = file.read()
+        config = config.replace("paths = []", f"paths = {json.dumps(self.seo_variations)}", 1)
+        with open(config_path, "w") as file:
+            file.write(config)
@@ -0,0 +1,226 @@
+"""
+Timed scenarios over a synthetic corpus, results saved as JSON to compare versions offline:
+
+    python -m benchmarks.run run --posts 20000 --shards 4 --output after.json
+    python -m benchmarks.run compare before.json after.json
+"""
+
+from datetime import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusGenerator
+
+import typer
+
+app = typer.Typer(help="Coeur benchmarks", no_args_is_help=True)
+
+SCENARIOS = (
+    "full_build",
+    "incremental_build",
+    "incremental_build_edit",
+    "admin_list",
+    "admin_search",
+    "pds_selection",
+    "markdown_import",
+)
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "unit": "s",
+        "samples": samples,
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def timed(function, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+class BenchmarkRunner:
+    def __init__(self, corpus: CorpusGenerator, repeat: int, queries: int, import_posts: int):
+        self.corpus = corpus
+        self.repeat = repeat
+        self.queries = queries
+        self.import_posts = import_posts
+
+    def full_build(self) -> list[float]:
+        from coeur.apps.ssg.build import BuildHandler
+
+        return [timed(BuildHandler(full=True).handler) for _ in range(self.repeat)]
+
+    def incremental_build(self) -> list[float]:
+        from coeur.apps.ssg.build import BuildHandler
+
+        return [timed(BuildHandler().handler) for _ in range(self.repeat)]
+
+    def incremental_build_edit(self) -> list[float]:
+        from coeur.apps.ssg.build import BuildHandler
+
+        samples = []
+        for run in range(self.repeat):
+            conn = sqlite3.connect("db/db1.sqlite")
+            conn.execute(
+                "UPDATE posts SET content = content || ? WHERE uuid = (SELECT MAX(uuid) FROM posts)",
+                (f"\n\nEdited {run}.",),
+            )
+            conn.commit()
+            conn.close()
+            samples.append(timed(BuildHandler().handler))
+        return samples
+
+    def admin_list(self) -> list[float]:
+        from coeur.apps.ssg.admin import AdminHandler
+
+        admin = AdminHandler()
+        last_page = max(self.corpus.posts // 20, 1)
+        pages = [1, 2, last_page // 2 or 1, last_page]
+        return [
+            timed(admin._api_list_posts, "all", pages[index % len(pages)], 20)
+            for index in range(self.queries)
+        ]
+
+    def admin_search(self) -> list[float]:
+        from benchmarks.corpus import WORDS
+        from coeur.apps.ssg.admin import AdminHandler
+
+        admin = AdminHandler()
+        return [
+            timed(admin._api_search_posts, WORDS[index % len(WORDS)])
+            for index in range(self.queries)
+        ]
+
+    def pds_selection(self) -> list[float]:
+        from coeur.apps.pds.channels import Channels
+        from coeur.apps.ssg.db import DatabaseManager
+
+        # the selection of pds Engine.publish: the newest post not yet published on the channel
+        samples = []
+        for index in range(self.queries):
+            channel = list(Channels)[index % len(Channels)]
+            db = DatabaseManager()
+            samples.append(
+                timed(db.get_posts, limit=1, exclude_filters=[{"extra": f'"{channel.value}": {{'}])
+            )
+            db.session.close()
+        return samples
+
+    def markdown_import(self) -> list[float]:
+        from coeur.apps.ssg.markdown import MarkdownHandler
+
+        cwd = os.getcwd()
+        content = os.path.abspath("../markdown")
+        self.corpus.write_markdown(content, self.import_posts)
+        samples = []
+        try:
+            for run in range(self.repeat):
+                os.chdir(os.path.dirname(content))
+                CorpusGenerator(posts=0, shards=1).create(f"import-{run}")
+                os.chdir(f"import-{run}")
+                samples.append(timed(MarkdownHandler.handler, content))
+                os.chdir(cwd)
+        finally:
+            os.chdir(cwd)
+        return samples
+
+
+@app.command()
+def run(
+    posts: int = 10000,
+    shards: int = 4,
+    seed: int = 42,
+    repeat: int = 3,
+    queries: int = 50,
+    import_posts: int = 2000,
+    scenarios: str = ",".join(SCENARIOS),
+    output: str = "benchmark.json",
+    workdir: str = None,
+    keep: bool = False,
+):
+    """Generate the corpus and run the scenarios (comma separated), writing the JSON results"""
+    selected = [scenario.strip() for scenario in scenarios.split(",") if scenario.strip()]
+    if unknown := set(selected) - set(SCENARIOS):
+        raise typer.BadParameter(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    output = os.path.abspath(output)
+    cwd = os.getcwd()
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="coeur-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+    corpus = CorpusGenerator(posts=posts, shards=shards, seed=seed)
+    runner = BenchmarkRunner(corpus, repeat=repeat, queries=queries, import_posts=import_posts)
+
+    results = {}
+    try:
+        os.chdir(workdir)
+        typer.echo(f"Generating {posts} posts over {shards} shards in {workdir}")
+        generation = timed(corpus.create, "blog")
+        os.chdir("blog")
+        for scenario in SCENARIOS:
+            if scenario in selected:
+                typer.echo(f"Running {scenario}...")
+                results[scenario] = summarize(getattr(runner, scenario)())
+                typer.echo(f"  median {results[scenario]['median']:.4f}s")
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    from coeur import __version__
+
+    report = {
+        "coeur_version": __version__,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {**corpus.params(), "generation_seconds": generation},
+        "repeat": repeat,
+        "queries": queries,
+        "import_posts": import_posts,
+        "scenarios": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    typer.echo(f"Results saved to {output}")
+
+
+@app.command()
+def compare(baseline: str, current: str, threshold: float = 0.1):
+    """Compare the medians of two result files, failing when one is slower by more than threshold"""
+    with open(baseline) as file:
+        before = json.load(file)["scenarios"]
+    with open(current) as file:
+        after = json.load(file)["scenarios"]
+
+    regressions = []
+    for scenario in SCENARIOS:
+        if scenario not in before or scenario not in after:
+            continue
+        old, new = before[scenario]["median"], after[scenario]["median"]
+        change = (new - old) / old if old else 0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(scenario)
+        typer.echo(f"{scenario:<24} {old:>10.4f}s {new:>10.4f}s {change:>+8.1%}{flag}")
+    if regressions:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -1,5 +1,3 @@
-from coeur.apps.cmp.engine import Engine
-
 import typer
 
 app = typer.Typer()
@@ -21,6 +19,8 @@ def title_to_post(
     You can optionally specify an image URL, a custom prompt to influence the tone or theme,\n
     and a custom path for defining the blog post URL.
     """
+    from coeur.apps.cmp.engine import Engine
+
     Engine().title_to_post(
         title,
         model,
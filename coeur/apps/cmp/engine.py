@@ -8,9 +8,6 @@ from slugify import slugify
 from openai import OpenAI
 from dotenv import load_dotenv
 
-load_dotenv(dotenv_path="./.env")
-
-
 class Content:
     title: str
     img_url: str | None
@@ -24,6 +21,7 @@ class Content:
 
 class OpenAIEngine:
     def client(self):
+        load_dotenv(dotenv_path="./.env")
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("API key is missing or not set in the environment variables.")
@@ -83,7 +81,7 @@ class Engine:
 
     @staticmethod
     def store_post(content: Content, custom_path: str = None):
-        db = DatabaseManager()
+        db = DatabaseManager(profile="import")
         today = datetime.now()
         try:
             post = db.new_post(
@@ -95,7 +93,7 @@ class Engine:
                 date=today.strftime("%Y-%m-%d"),
                 image=content.img_url,
             )
-            db.session.add(post)
+            db.add_posts([post])
             db.session.commit()
         except Exception as e:
             print(e)
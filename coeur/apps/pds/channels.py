@@ -2,13 +2,6 @@ from abc import ABC, abstractmethod
 from enum import Enum
 import os
 
-from coeur.apps.ssg.db import Post
-
-from dotenv import load_dotenv
-
-
-load_dotenv(dotenv_path="./.env")
-
 
 class Channels(Enum):
     INSTAGRAM = "instagram"
@@ -15,10 +15,6 @@ from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 
-load_dotenv(dotenv_path="./.env")
-SOCIAL_DEFAULT_IMAGE_URL = os.getenv("SOCIAL_DEFAULT_IMAGE_URL")
-
-
 class Engine:
     def __init__(
         self,
@@ -32,7 +28,10 @@ class Engine:
         self.post_header = post_header
         self.post_footer = post_footer
 
-        if not SOCIAL_DEFAULT_IMAGE_URL:
+        # channel credentials are read from the environment too
+        load_dotenv(dotenv_path="./.env")
+        self.social_default_image_url = os.getenv("SOCIAL_DEFAULT_IMAGE_URL")
+        if not self.social_default_image_url:
             raise ValueError("SOCIAL_DEFAULT_IMAGE_URL not defined on .env.")
 
     def run(self) -> None:
@@ -92,7 +91,7 @@ class Engine:
     def handle_img(self, image_url=None) -> str | None:
         try:
             if not image_url:
-                image_url = SOCIAL_DEFAULT_IMAGE_URL
+                image_url = self.social_default_image_url
             os.makedirs("temp", exist_ok=True)
             extension = os.path.splitext(urlparse(image_url).path)[1] or ".jpg"
             local_path = os.path.join("temp", f"{uuid.uuid4()}{extension}")
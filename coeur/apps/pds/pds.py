@@ -1,4 +1,3 @@
-from coeur.apps.pds.engine import Engine
 from coeur.apps.pds.channels import Channels
 
 import typer
@@ -11,4 +10,6 @@ from typing import List
 def publish(
     channels: List[Channels], total: int = 1, post_header: str = None, post_footer: str = None
 ) -> None:
+    from coeur.apps.pds.engine import Engine
+
     Engine(channels, total, post_header, post_footer).run()
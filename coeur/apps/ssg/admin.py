@@ -10,9 +10,9 @@ from pathlib import Path
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import text
 
 from coeur.apps.ssg.db import DatabaseManager, ShardingManager
+from coeur.apps.ssg.search import PostSearch
 from pydantic import BaseModel
 
 
@@ -47,6 +47,7 @@ class AdminHandler:
         self.host = host or self.DEFAULT_HOST
         self.port = port or self.DEFAULT_PORT
         self.static_admin = Path(__file__).resolve().parent / "static" / "admin"
+        self.search = PostSearch()
         self._app = FastAPI(title="Coeur SSG Admin")
         self._register_routes()
 
@@ -68,8 +69,14 @@ class AdminHandler:
             return self._api_list_databases()
 
         @app.get("/api/posts/search")
-        def api_search_posts(title: str = Query(..., min_length=1)):
-            return self._api_search_posts(title)
+        def api_search_posts(
+            q: str = Query(None, min_length=1),
+            title: str = Query(None, min_length=1),
+        ):
+            # `title` is the parameter of the former title-only search
+            if not (q or title):
+                raise HTTPException(status_code=422, detail="q is required")
+            return self._api_search_posts(q or title)
 
         @app.get("/api/posts/by-id")
         def api_get_post_by_id(uuid: str = Query(...), db: int = Query(...)):
@@ -104,21 +111,9 @@ class AdminHandler:
         dbs = self._get_databases_sorted()
         return [{"index": i, "name": f.replace(".sqlite", "")} for i, f in enumerate(dbs, start=1)]
 
-    def _api_search_posts(self, title: str):
-        union = ShardingManager.generate_union_posts_query()
-        query = f"""
-            SELECT * FROM ({union}) AS u
-            WHERE title LIKE :title
-            ORDER BY date DESC
-            LIMIT 50
-        """
-        db = DatabaseManager()
-        try:
-            result = db.session.execute(text(query), {"title": f"%{title}%"})
-            rows = result.fetchall()
-            return [_row_to_dict(r) for r in rows]
-        finally:
-            db.session.close()
+    def _api_search_posts(self, query: str):
+        # ranked full-text matches of titles and contents, every shard searched in parallel
+        return self.search.search(query, limit=50)
 
     def _api_get_post_by_id(self, uuid: str, db_index: int):
         dbs = self._get_databases_sorted()
@@ -143,17 +138,11 @@ class AdminHandler:
         offset = (page - 1) * per_page
 
         if db == "all":
-            union = ShardingManager.generate_union_posts_query()
             dbm = DatabaseManager()
             try:
                 total = dbm.count_total_posts()
-                query = f"""
-                    SELECT * FROM ({union}) AS u
-                    ORDER BY date DESC
-                    LIMIT :limit OFFSET :offset
-                """
-                result = dbm.session.execute(text(query), {"limit": per_page, "offset": offset})
-                rows = result.fetchall()
+                # merged from the ordered slices of every shard, the union is never sorted
+                rows = dbm.get_posts(page=page, limit=per_page)
                 items = [_row_to_dict(r) for r in rows]
                 return {"items": items, "total": total, "page": page, "per_page": per_page}
             finally:
@@ -169,8 +158,7 @@ class AdminHandler:
             conn = sqlite3.connect(path)
             conn.row_factory = sqlite3.Row
             try:
-                cur = conn.execute("SELECT COUNT(*) FROM posts")
-                total = cur.fetchone()[0]
+                total = ShardingManager.count_posts(conn)
                 cur = conn.execute(
                     "SELECT * FROM posts ORDER BY date DESC LIMIT ? OFFSET ?",
                     (per_page, offset),
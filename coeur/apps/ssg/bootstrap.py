@@ -29,6 +29,26 @@ next_text="Next Page"
 
 [seo_variations]
 paths = []
+# variation pages are "hardlink" or "symlink" to the post page, or a "copy" of it
+link = "hardlink"
+
+[build]
+# "process" renders posts on worker processes, "thread" keeps them in the build process
+render_backend = "process"
+# number of render workers, 0 means one per CPU core
+workers = 0
+# posts rendered at the same time, it bounds the memory used by the build
+max_in_flight = 256
+
+# SQLite PRAGMAs of db1 and every shard: "build" is used by builds, servers and the admin,
+# "import" by markdown-to-db and cmp, any PRAGMA set here overrides the preset
+[database.build]
+journal_mode = "wal"
+mmap_size = 268435456
+
+[database.import]
+journal_mode = "wal"
+synchronous = "normal"
 """
 
 ENV_TEMPLATE = """
@@ -45,6 +65,7 @@ GITIGNORE_TEMPLATE = """
 .env
 session.json
 public/*
+.coeur/
 """
 
 
@@ -1,12 +1,33 @@
-from concurrent.futures import as_completed
+from contextlib import nullcontext
 from datetime import datetime
+from enum import Enum
+import itertools
 import os
 import shutil
+import threading
+import time
+import traceback
+import warnings
 
-from coeur.apps.ssg.db import DatabaseManager, Post, ContentFormat
+from coeur import __version__
+from coeur.apps.ssg.db import DatabaseManager, Post, ContentFormat, ShardReader
+from coeur.apps.ssg.graph import TemplateGraph
+from coeur.apps.ssg.manifest import BuildManifest
+from coeur.apps.ssg.output import OutputWriter, Precompressor
+from coeur.apps.ssg.pipeline import BuildPipeline
+from coeur.apps.ssg.profiling import BuildProfiler
+from coeur.apps.ssg.render import ProcessRenderEngine, RenderBackend, RenderCache
+from coeur.apps.ssg.sitemap import SitemapWriter
 from coeur.utils import Benchmark, BuildSettings, HttpHandler
 
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 import minify_html
@@ -15,14 +36,63 @@ import mistune
 benchmark = Benchmark()
 
 
+def rechunk(batches, size: int):
+    posts = itertools.chain.from_iterable(batches)
+    while chunk := list(itertools.islice(posts, size)):
+        yield chunk
+
+
+def track(batches, progress: Progress, task):
+    for batch in batches:
+        yield batch
+        progress.advance(task, len(batch))
+
+
+class Pagination(Enum):
+    NEWEST = "newest"
+    STABLE = "stable"
+
+
+class VariationLink(Enum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    SYMLINK = "symlink"
+
+
 class BuildHandler:
-    def __init__(self, max_posts: int = None):
+    # build stages, with the template each one renders
+    STAGES = {"pages": "page.html", "posts": "post.html", "sitemaps": None}
+
+    def __init__(self, max_posts: int = None, full: bool = False, profile: bool = False):
         self.max_posts = max_posts
+        self.full = full
         self.settings = BuildSettings("./config.toml")
-        self.clean_and_copy_statics()
+        self.profiler = (
+            BuildProfiler(slowest=self.settings.get_build_option("profile_slowest", 20))
+            if profile
+            else None
+        )
+        self.manifest = None
+        self.template_digests = {}
+        atomic = self.settings.get_build_option("atomic_writes", False)
+        self.precompressor = (
+            Precompressor(atomic=atomic)
+            if self.settings.get_build_option("precompress", False)
+            else None
+        )
+        self.render_cache = (
+            RenderCache(self.settings.cache_folder)
+            if self.settings.get_build_option("render_cache", True)
+            else None
+        )
+        self.writer = OutputWriter(self.settings.root_folder, atomic=atomic)
 
     def clean_and_copy_statics(self):
         shutil.rmtree(self.settings.root_folder, ignore_errors=True)
+        self.writer.folders.clear()
+        self.copy_statics()
+
+    def copy_statics(self):
         if os.path.exists(f"{self.settings.template_folder}/static"):
             shutil.copytree(
                 f"{self.settings.template_folder}/static",
@@ -30,125 +100,465 @@ class BuildHandler:
                 dirs_exist_ok=True,
             )
 
-    def handler(self, *args, **kwargs) -> None:
+    def copy_static(self, path: str) -> None:
+        """Copy a single file of the template static folder, `path` being relative to it."""
+        source = os.path.join(self.settings.template_folder, "static", path)
+        if not os.path.isfile(source):
+            return
+        target = self.writer.path(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(source, target)
+
+    def load_manifest(self) -> BuildManifest:
+        # templates are hashed per stage (see `template_digests`), so editing page-item.html
+        # does not invalidate every post
+        graph = TemplateGraph(self.settings.template_folder)
+        self.template_digests = {
+            stage: graph.digest(template) for stage, template in self.STAGES.items() if template
+        }
+        inputs = BuildManifest.hash_files(self.settings.config_path)
+        return BuildManifest(
+            self.settings.cache_folder,
+            f"{__version__}:{inputs}",
+            incremental=not self.full and os.path.exists(self.settings.root_folder),
+        )
+
+    def handler(self, *args, stages: set = None, **kwargs) -> None:
+        """Build the site. `stages` limits the build to some of `STAGES`, the outputs of the
+        others are kept as they are."""
+        if self.profiler:
+            self.profiler.start()
+        self.manifest = self.load_manifest()
+        self.manifest.meta = {
+            "seo_variations": self.settings.get_seo_variations_path(),
+            "seo_variations_link": self.settings.get_seo_variations_link(),
+            "precompress": self.precompressor.siblings if self.precompressor else [],
+        }
+        # variation files changing kind or compressed siblings coming and going need a clean
+        # output, so no write goes through an old link and no stale sibling is left behind
+        for key in ("seo_variations_link", "precompress"):
+            current = self.manifest.meta[key]
+            if self.manifest.previous_meta.get(key, current) != current:
+                self.manifest.reset()
+        with self.stage("statics"):
+            if self.manifest.incremental:
+                self.copy_statics()
+            else:
+                self.clean_and_copy_statics()
+                stages = None
+        stages = set(self.STAGES) if stages is None else set(stages)
+        for stage in set(self.STAGES) - stages:
+            self.manifest.keep(stage)
+        # a full build renders every post, the cached Markdown no post uses anymore can go
+        prune_cache = bool(self.render_cache) and not (self.manifest.incremental or self.max_posts)
+
+        with self.stage("count"):
+            db = DatabaseManager()
+            total = db.count_total_posts()
+            db.session.close()
+        if self.max_posts:
+            total = min(total, self.max_posts)
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
             transient=True,
             auto_refresh=True,
         ) as progress:
-            task = progress.add_task(description="Creating pages (pagination)...", total=10)
-            self.create_pagination()
-            progress.update(task_id=task, advance=10)
-
-            task = progress.add_task(description="Creating single posts...", total=10)
-            self.create_posts_from_db()
-            progress.update(task_id=task, advance=10)
-
-            task = progress.add_task(description="Creating sitemap...", total=10)
-            self.create_sitemap()
-            progress.update(task_id=task, advance=10)
-
-    def create_sitemap(
-        self,
-    ):
-        base_url = (
-            self.settings.config["base_url"][:-1]
-            if self.settings.config["base_url"].endswith("/")
-            else self.settings.config["base_url"]
-        )
-        sitemaps = []
+            tasks = {}
+            for stage, description in (
+                ("pages", "Creating pages (pagination)..."),
+                ("posts", "Creating single posts..."),
+                ("sitemaps", "Creating sitemap..."),
+            ):
+                if stage in stages:
+                    tasks[stage] = progress.add_task(description=description, total=total)
+
+            if stages and self.settings.get_build_option("pipeline", True):
+                pipeline_stages = {
+                    "pages": lambda batches: self.profiled(
+                        "pages",
+                        self.create_pagination,
+                        track(batches, progress, tasks["pages"]),
+                        total_posts=total,
+                    ),
+                    "posts": lambda batches: self.profiled(
+                        "posts",
+                        self.create_posts_from_db,
+                        track(batches, progress, tasks["posts"]),
+                        track_cache=prune_cache,
+                    ),
+                    "sitemaps": lambda batches: self.profiled(
+                        "sitemaps",
+                        self.create_sitemap,
+                        track(batches, progress, tasks["sitemaps"]),
+                    ),
+                }
+                queue_size = self.settings.get_build_option("pipeline_queue_size", 4)
+                # pagination and sitemap share one ordered read of the listing columns, the
+                # single posts read the full rows from every shard in parallel alongside
+                pipelines = []
+                listing = [stage for stage in ("pages", "sitemaps") if stage in stages]
+                if listing:
+                    pipelines.append(
+                        (
+                            BuildPipeline(
+                                self.read_listing(self.settings.posts_db_pagination),
+                                queue_size=queue_size,
+                            ),
+                            [pipeline_stages[stage] for stage in listing],
+                        )
+                    )
+                if "posts" in stages:
+                    pipelines.append(
+                        (
+                            BuildPipeline(self.read_shards(), queue_size=queue_size),
+                            [pipeline_stages["posts"]],
+                        )
+                    )
+                BuildPipeline.run_all(*pipelines)
+            else:
+                if "pages" in stages:
+                    self.profiled(
+                        "pages",
+                        self.create_pagination,
+                        track(
+                            self.read_listing(self.settings.posts_pagination),
+                            progress,
+                            tasks["pages"],
+                        ),
+                        total_posts=total,
+                    )
+                if "posts" in stages:
+                    self.profiled(
+                        "posts",
+                        self.create_posts_from_db,
+                        track(self.read_shards(), progress, tasks["posts"]),
+                        track_cache=prune_cache,
+                    )
+                if "sitemaps" in stages:
+                    self.profiled(
+                        "sitemaps",
+                        self.create_sitemap,
+                        track(
+                            self.read_listing(self.settings.posts_db_pagination),
+                            progress,
+                            tasks["sitemaps"],
+                        )
+                    )
+
+        with self.stage("cleanup"):
+            if prune_cache:
+                self.render_cache.prune()
+            self.remove_stale_outputs()
+            self.manifest.save()
+
+        if self.profiler:
+            self.profiler.stop()
+            print(f"Build profile saved to {self.profiler.save(self.settings.cache_folder)}")
+
+    def stage(self, name: str):
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+
+    def profiled(self, name: str, create, *args, **kwargs):
+        with self.stage(name):
+            return create(*args, **kwargs)
+
+    def remove_stale_outputs(self) -> None:
+        variations = self.settings.get_seo_variations_path()
+        previous_variations = self.manifest.previous_meta.get("seo_variations", [])
+        removed_variations = [path for path in previous_variations if path not in variations]
+
+        stale_files = []
+        for post_path in self.manifest.stale("posts"):
+            stale_files.extend(self.post_output_paths(post_path, previous_variations))
+        if removed_variations:
+            for post_path in self.manifest.keys("posts"):
+                stale_files.extend(self.post_output_paths(post_path, removed_variations)[1:])
+        stale_files.extend(self.manifest.stale("pages"))
+        stale_files.extend(self.manifest.stale("sitemaps"))
+
+        for path in stale_files:
+            self.remove_file(path)
+
+    def remove_file(self, path: str) -> None:
+        root_folder = os.path.normpath(self.settings.root_folder)
+        file_path = self.writer.path(path)
+        for sibling in Precompressor.SIBLINGS:
+            try:
+                os.remove(f"{file_path}{sibling}")
+            except FileNotFoundError:
+                ...
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            return
+        folder = os.path.dirname(file_path)
+        while folder.startswith(f"{root_folder}{os.sep}"):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                break
+            self.writer.folders.discard(folder)
+            folder = os.path.dirname(folder)
+
+    @staticmethod
+    def post_output_paths(post_path: str, seo_variations: list) -> list[str]:
+        return [f"{post_path}/index.html"] + [
+            f'/{post_path.rstrip("/")}-{path}/index.html' for path in seo_variations
+        ]
+
+    def listing_digest(self, posts: list, *extra) -> str:
+        parts = [self.template_digests.get("pages"), *extra]
+        for post in posts:
+            parts.extend((post.uuid, post.title, post.path, post.image, post.date))
+        return self.manifest.digest(*parts)
+
+    def read_posts(self, total_by_page: int, columns: list = None):
         db = DatabaseManager()
-        max_items_by_sitemap = 30000
-        seo_variations = self.settings.get_seo_variations_path()
-        seo_variations_count = len(seo_variations) if seo_variations else 1
-        total_by_page = int(max_items_by_sitemap / seo_variations_count)
+        db.profiler = self.profiler
+        try:
+            yield from db.generator_page_posts(
+                total_by_page=total_by_page, max_posts_server=self.max_posts, columns=columns
+            )
+        finally:
+            db.session.close()
 
-        for page, posts_db_page in enumerate(
-            db.generator_page_posts(total_by_page=total_by_page, max_posts_server=self.max_posts),
-            start=1,
-        ):
-            extra_posts = []
-            for post in posts_db_page:
-                for path in seo_variations:
-                    extra_post = post.__dict__.copy()
-                    extra_post.pop("_sa_instance_state", None)
-                    extra_post["path"] = f'{post.path.rstrip("/")}-{path}/'
-                    extra_post["date"] = datetime.today().strftime("%Y-%m-%d")
-                    extra_posts.append(Post(**extra_post))
-
-            sitemap = self.settings.templates["sitemap"].render(
-                {"entries": posts_db_page + extra_posts}
+    def read_listing(self, total_by_page: int):
+        return self.read_posts(total_by_page, columns=DatabaseManager.LISTING_COLUMNS)
+
+    def read_shards(self):
+        if self.max_posts:
+            # the newest posts, the ones pagination and the sitemap list, not the first rows
+            # the shard threads happen to deliver
+            return self.read_posts(self.settings.posts_db_pagination)
+        reader = ShardReader(batch_size=self.settings.posts_db_pagination, profiler=self.profiler)
+        return reader.generator_page_posts(max_posts=self.max_posts)
+
+    def create_sitemap(self, posts_batches=None):
+        base_url = self.settings.get_base_url()
+        seo_variations = self.settings.get_seo_variations_path()
+        today = datetime.today().strftime("%Y-%m-%d")
+        if posts_batches is None:
+            posts_batches = self.read_listing(self.settings.posts_db_pagination)
+        if os.path.isfile(os.path.join(self.settings.template_folder, "sitemap.xml")):
+            # exported by older versions, a customised one would be dropped without a word
+            warnings.warn(
+                "templates/sitemap.xml is no longer rendered, the sitemaps only list the posts "
+                "and their SEO variations (remove the template to silence this warning)"
             )
-            self.create_file(f"/sitemap{page}.xml", sitemap)
-            sitemaps.append(f"<sitemap><loc>{base_url}/sitemap{page}.xml</loc></sitemap>")
 
+        with SitemapWriter(
+            self.settings.root_folder,
+            self.manifest,
+            max_urls=self.settings.get_build_option("sitemap_max_urls", 30000),
+            compress=self.settings.get_build_option("sitemap_gzip", False),
+            precompressor=self.precompressor,
+            profiler=self.profiler,
+        ) as writer:
+            for posts_db_page in posts_batches:
+                for post in posts_db_page:
+                    writer.add(post.permalink, post.date)
+                    for path in seo_variations:
+                        writer.add(f'{base_url}{post.path.rstrip("/")}-{path}/', today)
+            filenames = writer.close()
+
+        sitemaps = [
+            f"<sitemap><loc>{base_url}/{filename}</loc></sitemap>" for filename in filenames
+        ]
         sitemap_index = f"""<?xml version="1.0" encoding="UTF-8"?>
             <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
             {" ".join(sitemaps)}
         </sitemapindex>
         """
-        self.create_file(f"/sitemap.xml", sitemap_index)
-        db.session.close()
+        digest = self.manifest.digest(*sitemaps)
+        if not self.manifest.is_fresh("sitemaps", "/sitemap.xml", digest):
+            written = self.create_file(f"/sitemap.xml", sitemap_index)
+            if self.profiler:
+                self.profiler.add_write(written)
+            self.manifest.record("sitemaps", "/sitemap.xml", digest)
 
-    def create_pagination(
-        self,
-    ):
-        db = DatabaseManager()
-        total = 0
+    def create_pagination(self, posts_batches=None, total_posts: int = None):
+        if posts_batches is None:
+            posts_batches = self.read_listing(self.settings.posts_pagination)
+        pagination = self.settings.get_build_option("pagination", Pagination.NEWEST.value)
+        if pagination == Pagination.STABLE.value:
+            return self.create_stable_pagination(posts_batches, total_posts)
 
         for page, posts_db_page in enumerate(
-            db.generator_page_posts(
-                total_by_page=self.settings.posts_pagination, max_posts_server=self.max_posts
-            ),
-            start=1,
+            rechunk(posts_batches, self.settings.posts_pagination), start=1
         ):
-            navigation = {"current": page}
-            total += page
+            page_path = "/index.html" if page == 1 else f"/page/{page}/index.html"
+            self.create_listing_page(page_path, posts_db_page, self.listing_navigation(page))
+
+    def listing_navigation(self, page: int) -> dict:
+        navigation = {"current": page}
+        total = page * (page + 1) / 2
+
+        if page > 1:
+            previous = page - 1
+            if previous == 1:
+                navigation["previous"] = "/index.html"
+            else:
+                navigation["previous"] = f"/page/{previous}"
 
-            if page > 1:
-                previous = page - 1
-                if previous == 1:
-                    navigation["previous"] = "/index.html"
-                else:
-                    navigation["previous"] = f"/page/{previous}"
+        if page > (total / self.settings.posts_pagination):
+            navigation["next"] = f"/page/{page + 1}"
+        return navigation
 
-            if page > (total / self.settings.posts_pagination):
-                navigation["next"] = f"/page/{page + 1}"
+    def create_stable_pagination(self, posts_batches, total_posts: int = None):
+        """Pages numbered from the oldest post: /page/1/ holds the oldest posts and only full
+        pages are written, so they never change when posts are added. The newest posts, that
+        do not fill a page yet, are only listed on index.html with the newest full page."""
+        per_page = self.settings.posts_pagination
+        if total_posts is None:
+            db = DatabaseManager()
+            total_posts = db.count_total_posts()
+            db.session.close()
+            if self.max_posts:
+                total_posts = min(total_posts, self.max_posts)
+        full_pages = total_posts // per_page
 
-            page_list = self.settings.templates["page"].render(
-                {"paginator": {"pages": posts_db_page, "navegation": navigation}}
+        # posts come newest first, so every full page is already in its display order
+        posts = itertools.chain.from_iterable(posts_batches)
+        newest = list(itertools.islice(posts, total_posts - full_pages * per_page))
+        page_posts = list(itertools.islice(posts, per_page)) if full_pages else []
+
+        self.create_listing_page(
+            "/index.html",
+            (newest + page_posts)[:per_page],
+            self.stable_navigation(full_pages + 1, full_pages),
+        )
+        for page in range(full_pages, 0, -1):
+            self.create_listing_page(
+                f"/page/{page}/index.html", page_posts, self.stable_navigation(page, full_pages)
             )
-            if page == 1:
-                self.create_file(f"/index.html", page_list)
-            else:
-                self.create_file(f"/page/{page}/index.html", page_list)
-        db.session.close()
+            page_posts = list(itertools.islice(posts, per_page))
 
-    def create_posts_from_db(
-        self,
-    ):
-        db = DatabaseManager()
+    @staticmethod
+    def stable_navigation(page: int, full_pages: int) -> dict:
+        """Navigation of a stable page, `full_pages + 1` being index.html."""
+        navigation = {"current": page}
+        if page <= full_pages:
+            navigation["previous"] = "/index.html" if page == full_pages else f"/page/{page + 1}"
+        if page > 1:
+            navigation["next"] = f"/page/{page - 1}"
+        return navigation
 
-        for posts_db_page in db.generator_page_posts(
-            total_by_page=self.settings.posts_db_pagination, max_posts_server=self.max_posts
-        ):
-            for future in as_completed(
-                (
-                    self.settings.coeur_thread_ex.submit(self.handle_post, post)
-                    for post in posts_db_page
-                )
-            ):
-                try:
-                    future.result()
-                except Exception as e:
-                    print(e)
-        db.session.close()
+    def create_listing_page(self, page_path: str, posts: list, navigation: dict) -> None:
+        digest = self.listing_digest(posts, sorted(navigation.items()))
+        if self.manifest.is_fresh("pages", page_path, digest):
+            return
+
+        written = self.create_file(page_path, self.render_listing_page(posts, navigation))
+        if self.profiler:
+            self.profiler.add_write(written)
+        self.manifest.record("pages", page_path, digest)
+
+    def render_listing_page(self, posts: list, navigation: dict) -> str:
+        return self.settings.templates["page"].render(
+            {"paginator": {"pages": posts, "navegation": navigation}}
+        )
+
+    def create_posts_from_db(self, posts_batches=None, track_cache: bool = False):
+        if posts_batches is None:
+            posts_batches = self.read_shards()
+        if track_cache:
+            posts_batches = self.render_cache.track(posts_batches)
+        if self.settings.get_render_backend() == RenderBackend.PROCESS.value:
+            return self.create_posts_with_processes(posts_batches)
+
+        # at most `max_in_flight` posts are pending, each one (and its HTML) is released once
+        # written, so memory does not depend on the size of the corpus
+        window = self.settings.get_render_window()
+        slots = threading.Semaphore(window)
+
+        def done(future):
+            slots.release()
+            if error := future.exception():
+                print(error)
+
+        for post in itertools.chain.from_iterable(posts_batches):
+            slots.acquire()
+            self.settings.coeur_thread_ex.submit(self.handle_post, post).add_done_callback(done)
+        # every slot back means every post is written
+        for _ in range(window):
+            slots.acquire()
+
+    def create_posts_with_processes(self, posts_batches):
+        def jobs():
+            for post in itertools.chain.from_iterable(posts_batches):
+                digest = self.post_digest(post)
+                if not self.manifest.is_fresh("posts", post.path, digest):
+                    yield post.to_dict(), digest
+
+        with ProcessRenderEngine(
+            self.settings.get_render_workers(), max_in_flight=self.settings.get_render_window()
+        ) as engine:
+            for path, digest, error, timings in engine.render(jobs()):
+                if error:
+                    print(error)
+                    continue
+                self.manifest.record("posts", path, digest)
+                if self.profiler:
+                    self.profiler.add_post(path, timings, worker=True)
+
+    def post_digest(self, post: Post) -> str:
+        return self.manifest.digest(
+            self.template_digests.get("posts"),
+            post.uuid,
+            post.title,
+            post.content,
+            post.content_format,
+            post.path,
+            post.extra,
+            post.date,
+            post.image,
+        )
 
     def handle_post(self, post: Post) -> None:
+        digest = self.post_digest(post)
+        if self.manifest.is_fresh("posts", post.path, digest):
+            return
+        timings = self.write_post(post)
+        self.manifest.record("posts", post.path, digest)
+        if self.profiler:
+            self.profiler.add_post(post.path, timings)
+
+    def write_post(self, post: Post) -> dict:
+        """Render and write a post, returning the time spent in each phase (`--profile`)."""
+        timings = {}
+        html = self.render_post(post, timings)
+        started = time.perf_counter()
+        canonical, *variations = self.post_output_paths(
+            post.path, self.settings.get_seo_variations_path()
+        )
+        written = [self.create_file(canonical, html)]
+        link = self.settings.get_seo_variations_link()
+        for path in variations:
+            if link == VariationLink.COPY.value:
+                written.append(self.create_file(path, html))
+            else:
+                self.create_link(canonical, path, symbolic=link == VariationLink.SYMLINK.value)
+        timings["write"] = time.perf_counter() - started
+        timings["files"] = sum(1 for size in written if size)
+        timings["bytes"] = sum(written)
+        return timings
+
+    def render_post(self, post: Post, timings: dict = None) -> str:
+        started = time.perf_counter()
         if post.content_format == ContentFormat.MARKDOWN.value:
-            post.content = mistune.html(post.content)
+            post.content = (
+                self.render_cache.markdown(post.content)
+                if self.render_cache
+                else mistune.html(post.content)
+            )
+        rendered = time.perf_counter()
         html = self.settings.templates["post"].render(post=post)
+        templated = time.perf_counter()
         if self.settings.config.get("minify", False):
             html = minify_html.minify(
                 html,
@@ -156,20 +566,45 @@ class BuildHandler:
                 minify_css=True,
                 remove_processing_instructions=True,
             )
-        self.create_file(f"{post.path}/index.html", html)
-        extra_paths = self.settings.get_seo_variations_path()
-        for path in extra_paths:
-            extra_path = f'{post.path.rstrip("/")}-{path}'
-            self.create_file(f"/{extra_path}/index.html", html)
-
-    def create_file(self, path: str, html: str) -> None:
-        folder_path = f"{self.settings.root_folder}/{path}"
-        file_path = os.path.dirname(folder_path)
-        if not os.path.exists(file_path):
-            os.makedirs(file_path)
-        with open(folder_path, "w") as file:
-            file.writelines(html)
-            file.close()
+        if timings is not None:
+            timings["markdown"] = rendered - started
+            timings["jinja"] = templated - rendered
+            timings["minify"] = time.perf_counter() - templated
+        return html
+
+    def create_file(self, path: str, html: str) -> int:
+        """Write `html` at `path`, returning the bytes written (0 when already up to date)."""
+        data = html.encode()
+        written = self.writer.write(path, data)
+        if written and self.precompressor and self.precompressor.accepts(path):
+            self.precompressor.compress(self.writer.path(path), data)
+        return len(data) if written else 0
+
+    def create_link(self, source: str, path: str, symbolic: bool = False) -> None:
+        source_path = self.writer.path(source)
+        link_path = self.writer.path(path)
+        folder = os.path.dirname(link_path)
+        if folder not in self.writer.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.writer.folders.add(folder)
+        self._link(source_path, link_path, symbolic)
+        for sibling in self.precompressor.siblings if self.precompressor else []:
+            self._link(f"{source_path}{sibling}", f"{link_path}{sibling}", symbolic)
+
+    @staticmethod
+    def _link(source_path: str, link_path: str, symbolic: bool) -> None:
+        try:
+            os.remove(link_path)
+        except FileNotFoundError:
+            ...
+        if symbolic:
+            os.symlink(os.path.relpath(source_path, os.path.dirname(link_path)), link_path)
+            return
+        try:
+            os.link(source_path, link_path)
+        except OSError:
+            # filesystems without hard links get a plain copy
+            shutil.copyfile(source_path, link_path)
 
     def serve(self, port: int):
         self.handler()
@@ -184,18 +619,83 @@ class BuildHandler:
 
 
 class ServerObserver:
+    """Rebuilds the site when templates change. Events are collected for a short delay, so an
+    editor saving several files triggers one build, static files are copied one by one and
+    only the stages rendering an edited template (or one it includes) are rebuilt."""
+
+    DELAY = 0.5
+
     def __init__(self, cls: BuildHandler) -> None:
         self.cls = cls
+        self.lock = threading.Lock()
+        # held for a whole rebuild, a build never starts while another one runs
+        self.build_lock = threading.Lock()
+        self.changes = set()
+        self.timer = None
 
     def observer(self):
         event_handler = FileSystemEventHandler()
-        event_handler.on_modified = self.on_change
+        event_handler.on_modified = self.on_event
+        event_handler.on_created = self.on_event
+        event_handler.on_deleted = self.on_event
+        event_handler.on_moved = self.on_event
         observer = Observer()
         observer.schedule(event_handler, self.cls.settings.template_folder, recursive=True)
         observer.start()
         return observer
 
+    def schedule(self):
+        # called with self.lock held
+        if self.timer:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.DELAY, self.on_change)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def on_event(self, event):
+        if event.is_directory:
+            return
+        with self.lock:
+            self.changes.add(event.src_path)
+            if dest_path := getattr(event, "dest_path", None):
+                self.changes.add(dest_path)
+            self.schedule()
+
     def on_change(self, *args):
-        self.cls.clean_and_copy_statics()
-        self.cls.handler()
+        with self.lock:
+            self.timer = None
+            # changes saved during a build stay queued, the build schedules them when it ends
+            if not self.build_lock.acquire(blocking=False):
+                return
+            changes, self.changes = self.changes, set()
+
+        try:
+            self.rebuild(changes)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self.lock:
+                self.build_lock.release()
+                if self.changes and not self.timer:
+                    self.schedule()
+
+    def rebuild(self, changes: set):
+        template_folder = self.cls.settings.template_folder
+        templates = set()
+        for path in changes:
+            name = os.path.relpath(path, template_folder).replace(os.sep, "/")
+            if name.startswith("static/"):
+                self.cls.copy_static(name[len("static/") :])
+            else:
+                templates.add(name)
+        if not templates:
+            return
+
+        graph = TemplateGraph(template_folder)
+        roots = {template: stage for stage, template in BuildHandler.STAGES.items() if template}
+        stages = {roots[root] for root in graph.affected(roots, templates)}
+        if not stages:
+            return
+        # templates are reloaded first, the manifest digest is taken from the files on disk
         self.cls.settings.reload_templates()
+        self.cls.handler(stages=stages)
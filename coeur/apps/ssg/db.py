@@ -1,16 +1,83 @@
+import functools
 import os
+import sqlite3
 import uuid
 import json
+import heapq
+import itertools
+import queue
+import threading
+import time
+import warnings
 from enum import Enum
 from coeur.utils import BuildSettings
 
-from sqlalchemy import Column, Integer, String, create_engine, text, MetaData
+from sqlalchemy import Column, Integer, String, create_engine, text
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
 
 Base = declarative_base()
-settings = BuildSettings("./config.toml")
+
+
+# PRAGMAs of db1 and of every attached shard, `[database.<profile>]` in config.toml overrides them
+PRAGMA_PROFILES = {
+    # builds and servers read every shard, memory-mapped and through a large page cache
+    "build": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "memory",
+    },
+    # markdown-to-db and cmp insert batches, appended to the WAL and synced on checkpoints
+    "import": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "mmap_size": 0,
+        "cache_size": -131072,
+        "temp_store": "memory",
+    },
+}
+# set on every attached schema, the other PRAGMAs once for the whole connection
+SCHEMA_PRAGMAS = {"journal_mode", "synchronous", "mmap_size", "cache_size"}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+@functools.cache
+def get_settings() -> BuildSettings:
+    # read on first use, so importing the module (and the CLI) has no side effect
+    return BuildSettings("./config.toml")
+
+
+def get_pragmas(profile: str) -> dict:
+    return {**PRAGMA_PROFILES.get(profile, {}), **get_settings().get_database_pragmas(profile)}
+
+
+def get_engine(profile: str = "build"):
+    """Process-wide pooled engine of db1, its connections have every shard attached and the
+    PRAGMAs of `profile` applied, so a DatabaseManager costs a pool checkout, not a connect."""
+    pragmas = get_pragmas(profile)
+    key = (os.path.abspath(f"db/{ShardingManager.DB1_NAME}"), json.dumps(pragmas, sort_keys=True))
+    with _engines_lock:
+        if (engine := _engines.get(key)) is None:
+            # every DatabaseManager closes its session, a leak waits on pool_timeout and shows
+            engine = create_engine(f"sqlite:///{key[0]}", pool_size=5, max_overflow=10)
+            event.listen(
+                engine,
+                "connect",
+                functools.partial(ShardingManager.attach_databases, pragmas=pragmas),
+            )
+            event.listen(
+                engine,
+                "checkout",
+                functools.partial(ShardingManager.attach_new_databases, pragmas=pragmas),
+            )
+            _engines[key] = engine
+    return engine
 
 
 class ContentFormat(Enum):
@@ -33,17 +100,15 @@ class Post(Base):
     def __init__(self, db, **kwargs):
         super().__init__(**kwargs)
         self.db = db
-        if db > 1:
-            db_name = f"db{db}"
-            self.__table__.schema = db_name
-            self.__table__.metadata = MetaData(schema=db_name)
-
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def to_dict(self) -> dict:
+        return {column.name: getattr(self, column.name) for column in inspect(Post).c}
+
     @property
     def permalink(self):
-        return f"{settings.get_base_url()}{self.path}"
+        return f"{get_settings().get_base_url()}{self.path}"
 
     @property
     def attrs(self):
@@ -68,13 +133,6 @@ class ShardingManager:
             post_classes[i] = type(f"PostDb{i}", (Post,), {})
         return post_classes
 
-    @staticmethod
-    def get_smallest_db():
-        smallest_db = min(
-            ShardingManager.get_databases(), key=lambda db: os.path.getsize(f"db/{db}")
-        )
-        return os.path.splitext(smallest_db)[0]
-
     @staticmethod
     def _get_posts_table_by_db(db_file: str):
         db = os.path.splitext(db_file)[0]
@@ -89,8 +147,14 @@ class ShardingManager:
         file_prefix = os.path.splitext(new_db_filename)[0]
         session.execute(text(f"ATTACH DATABASE 'db/{new_db_filename}' AS {file_prefix}"))
         session.execute(text(f"CREATE TABLE {file_prefix}.posts AS SELECT * FROM posts WHERE 0"))
+        for statement in ShardingManager.schema_statements(file_prefix):
+            session.execute(text(statement))
         session.commit()
+        ShardingManager.run_statements(
+            session, new_db_filename, ShardingManager.search_statements(file_prefix), text
+        )
         session.close()
+        return new_db_filename
 
     @staticmethod
     def generate_union_posts_query(fields: str = "*") -> str:
@@ -101,20 +165,336 @@ class ShardingManager:
         return " UNION ALL ".join(union_queries)
 
     @staticmethod
-    def attach_databases(session: Session, *args):
-        if databases := ShardingManager.get_databases():
-            for filename in databases:
-                if filename.endswith(".sqlite") and filename != ShardingManager.DB1_NAME:
-                    session.execute(
-                        f"ATTACH DATABASE 'db/{filename}' AS {os.path.splitext(filename)[0]}"
-                    )
+    def apply_pragmas(connection, pragmas: dict, schemas: list[str] = None):
+        schemas = schemas or ["main"]
+        for name, value in pragmas.items():
+            prefixes = [f"{schema}." for schema in schemas] if name in SCHEMA_PRAGMAS else [""]
+            for prefix in prefixes:
+                try:
+                    connection.execute(f"PRAGMA {prefix}{name} = {value}")
+                except sqlite3.OperationalError:
+                    # read-only shards keep the journal mode they have
+                    ...
+
+    @staticmethod
+    def attach_databases(connection, record=None, pragmas: dict = None):
+        databases = ShardingManager.get_databases()
+        schemas = []
+        for filename in databases:
+            schema = os.path.splitext(filename)[0]
+            if filename != ShardingManager.DB1_NAME:
+                connection.execute(f"ATTACH DATABASE 'db/{filename}' AS {schema}")
+            schemas.append("main" if filename == ShardingManager.DB1_NAME else schema)
+        ShardingManager.apply_pragmas(connection, pragmas or {}, schemas)
+        if databases:
+            ShardingManager.create_indexes(connection)
+        if record is not None:
+            record.info["databases"] = set(databases)
+
+    @staticmethod
+    def attach_new_databases(connection, record, proxy, pragmas: dict = None):
+        """Checkout hook: pooled connections pick up the shards created since they connected."""
+        databases = set(ShardingManager.get_databases())
+        if new_databases := databases - record.info.get("databases", set()):
+            attached = {row[1] for row in connection.execute("PRAGMA database_list")}
+            for filename in sorted(new_databases):
+                schema = os.path.splitext(filename)[0]
+                if schema not in attached:
+                    connection.execute(f"ATTACH DATABASE 'db/{filename}' AS {schema}")
+                    ShardingManager.apply_pragmas(connection, pragmas or {}, [schema])
+        record.info["databases"] = databases
+
+    @staticmethod
+    def attach_database(session: Session, filename: str, pragmas: dict = None):
+        """Attach a shard created after the session connected, the connect hook did the rest."""
+        schema = os.path.splitext(filename)[0]
+        attached = {row[1] for row in session.execute(text("PRAGMA database_list"))}
+        if schema not in attached:
+            session.execute(text(f"ATTACH DATABASE 'db/{filename}' AS {schema}"))
+            for name, value in (pragmas or {}).items():
+                # journal mode and synchronous can not change inside the session transaction
+                if name in SCHEMA_PRAGMAS - {"journal_mode", "synchronous"}:
+                    session.execute(text(f"PRAGMA {schema}.{name} = {value}"))
+
+    @staticmethod
+    def schema_statements(schema: str) -> list[str]:
+        return [
+            f"CREATE INDEX IF NOT EXISTS {schema}.idx_posts_listing "
+            f"ON posts ({', '.join(DatabaseManager.LISTING_COLUMNS)})",
+            f"CREATE INDEX IF NOT EXISTS {schema}.idx_posts_path ON posts (path)",
+            # shards made by create_new_database have no primary key to look posts up by uuid
+            f"CREATE INDEX IF NOT EXISTS {schema}.idx_posts_uuid ON posts (uuid)",
+            # the posts of the shard, kept by triggers so counting never reads the posts table;
+            # counted once when the table is new, after the triggers exist so no insert is missed
+            f"""
+            CREATE TABLE IF NOT EXISTS {schema}.posts_count (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL
+            )
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.posts_count_insert AFTER INSERT ON posts
+            BEGIN UPDATE posts_count SET total = total + 1; END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.posts_count_delete AFTER DELETE ON posts
+            BEGIN UPDATE posts_count SET total = total - 1; END
+            """,
+            f"""
+            INSERT INTO {schema}.posts_count (id, total)
+            SELECT 1, (SELECT COUNT(*) FROM {schema}.posts)
+            WHERE NOT EXISTS (SELECT 1 FROM {schema}.posts_count)
+            """,
+        ]
+
+    @staticmethod
+    def search_statements(schema: str) -> list[str]:
+        return [
+            # full-text index of titles and contents for the admin search (see search.py), it
+            # reads the text from posts and is filled once before its triggers keep it in sync
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.posts_fts USING fts5(
+                title, content, content='posts', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            f"""
+            INSERT INTO {schema}.posts_fts (posts_fts) SELECT 'rebuild'
+            WHERE NOT EXISTS (SELECT 1 FROM {schema}.posts_fts_docsize)
+            AND EXISTS (SELECT 1 FROM {schema}.posts)
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.posts_fts_insert AFTER INSERT ON posts
+            BEGIN
+                INSERT INTO posts_fts (rowid, title, content)
+                VALUES (new.rowid, new.title, new.content);
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.posts_fts_delete AFTER DELETE ON posts
+            BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, title, content)
+                VALUES ('delete', old.rowid, old.title, old.content);
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.posts_fts_update
+            AFTER UPDATE OF title, content ON posts
+            BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, title, content)
+                VALUES ('delete', old.rowid, old.title, old.content);
+                INSERT INTO posts_fts (rowid, title, content)
+                VALUES (new.rowid, new.title, new.content);
+            END
+            """,
+        ]
+
+    @staticmethod
+    def count_posts(connection, schema: str = "main") -> int:
+        """Posts of a shard on a DB-API `connection`, from posts_count when the shard has it."""
+        try:
+            if row := connection.execute(f"SELECT total FROM {schema}.posts_count").fetchone():
+                return row[0]
+        except sqlite3.OperationalError:
+            # read-only shards could not get the counter
+            ...
+        return connection.execute(f"SELECT COUNT(*) FROM {schema}.posts").fetchone()[0]
+
+    @staticmethod
+    def run_statements(session, filename: str, statements: list, wrap=str) -> bool:
+        """Run `statements` in one transaction, so no post lands between a backfill and its
+        triggers. A shard that can not take them is skipped, it stays readable without them."""
+        try:
+            # the write lock up front: connections opening together wait for each other
+            # instead of failing to upgrade a read transaction
+            session.execute(wrap("BEGIN IMMEDIATE"))
+            for statement in statements:
+                session.execute(wrap(statement))
+            session.commit()
+            return True
+        except (sqlite3.OperationalError, OperationalError) as e:
+            session.rollback()
+            warnings.warn(f"{filename} skipped: {e}", stacklevel=2)
+            return False
+
+    @staticmethod
+    def create_indexes(session: Session):
+        # keyset pagination walks each shard through this index instead of sorting it, and
+        # it covers the listing columns so pagination and sitemap never read post contents
+        for filename in ShardingManager.get_databases():
+            schema = "main" if filename == ShardingManager.DB1_NAME else os.path.splitext(filename)[0]
+            ShardingManager.run_statements(
+                session, filename, ShardingManager.schema_statements(schema)
+            )
+            # apart, a shard that can not get the search index (an SQLite built without FTS5)
+            # still gets the listing index and the counters
+            ShardingManager.run_statements(
+                session, filename, ShardingManager.search_statements(schema)
+            )
+
+
+class ShardRegistry:
+    """Row counts, estimated bytes and sealed state of every shard, kept in the `shards` table
+    of db1. Writes are routed to the active shard from memory, and the shard is sealed (and a new
+    one created) before a post would push it past `ShardingManager.MAX_FILE_SIZE_MB`."""
+
+    TABLE = "shards"
+    # sqlite record and b-tree cell headers of a row and of its index entries
+    ROW_OVERHEAD = 64
+    PAGE_SIZE = 4096
+    # posts_fts bytes by byte of title and content, prose stays well below, random words reach it
+    FTS_RATIO = 0.8
+
+    def __init__(self, on_create=None):
+        # called with the filename of every shard created by a rollover
+        self.on_create = on_create
+        self.shards = self.load()
+        self.pending = {}
+        self.active = self.pick()
+
+    @staticmethod
+    def connect() -> sqlite3.Connection:
+        conn = sqlite3.connect(f"db/{ShardingManager.DB1_NAME}")
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {ShardRegistry.TABLE} (
+                name TEXT PRIMARY KEY,
+                rows INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                sealed INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        return conn
+
+    @staticmethod
+    def file_size(filename: str) -> int:
+        # in WAL mode the last writes stay in the -wal file until a checkpoint
+        size = os.path.getsize(f"db/{filename}")
+        if os.path.exists(f"db/{filename}-wal"):
+            size += os.path.getsize(f"db/{filename}-wal")
+        return size
+
+    @staticmethod
+    def max_bytes() -> int:
+        return int(ShardingManager.MAX_FILE_SIZE_MB * 1024 * 1024)
+
+    def load(self) -> dict:
+        conn = self.connect()
+        shards = {
+            name: {"rows": rows, "bytes": size, "sealed": bool(sealed)}
+            for name, rows, size, sealed in conn.execute(
+                f"SELECT name, rows, bytes, sealed FROM {self.TABLE}"
+            )
+        }
+        # shards written outside the registry (older projects, copies, imports) are counted once
+        for filename in ShardingManager.get_databases():
+            if filename not in shards:
+                shard = sqlite3.connect(f"db/{filename}")
+                rows = shard.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+                shard.close()
+                shards[filename] = {"rows": rows, "bytes": 0, "sealed": False}
+                conn.execute(
+                    f"INSERT INTO {self.TABLE} (name, rows, bytes) VALUES (?, ?, 0)",
+                    (filename, rows),
+                )
+        # the open shards are few, their real size replaces the estimate of past sessions
+        for filename, shard in shards.items():
+            if not shard["sealed"]:
+                shard["bytes"] = self.file_size(filename)
+                shard["sealed"] = shard["bytes"] >= self.max_bytes()
+                conn.execute(
+                    f"UPDATE {self.TABLE} SET bytes = ?, sealed = ? WHERE name = ?",
+                    (shard["bytes"], shard["sealed"], filename),
+                )
+        conn.commit()
+        conn.close()
+        return shards
+
+    def pick(self) -> str | None:
+        open_shards = [name for name, shard in self.shards.items() if not shard["sealed"]]
+        return min(open_shards, key=lambda name: self.shards[name]["bytes"], default=None)
 
     @staticmethod
-    def manage_database_size(*args):
-        smallest_db = ShardingManager.get_smallest_db()
-        file_size = os.path.getsize(f"db/{smallest_db}.sqlite")
-        if file_size > ShardingManager.MAX_FILE_SIZE_MB * 1024 * 1024:
-            ShardingManager.create_new_database()
+    def estimate(post: dict) -> int:
+        record = index = ShardRegistry.ROW_OVERHEAD
+        for column, value in post.items():
+            if value is not None:
+                length = len(str(value).encode())
+                record += length
+                # listing columns, path and uuid are stored again in the shard indexes
+                copies = (column in DatabaseManager.LISTING_COLUMNS) + (column in ("path", "uuid"))
+                index += length * copies
+                if column in ("title", "content"):
+                    index += int(length * ShardRegistry.FTS_RATIO)
+        page = ShardRegistry.PAGE_SIZE
+        if record > page - 35:
+            # large rows spill into overflow pages, which are never shared
+            record = -(-record // (page - 4)) * page
+        else:
+            # b-tree pages hold whole rows and stay about three quarters full after splits
+            rows_by_page = (page - 8) // (record + 4)
+            record = page if rows_by_page == 1 else page * 4 // (3 * rows_by_page)
+        return record + index * 4 // 3
+
+    def route(self, post: dict) -> int:
+        """Shard number for `post`, counted as pending until the session commits."""
+        size = self.estimate(post)
+        shard = self.shards.get(self.active)
+        if shard is None or (shard["rows"] and shard["bytes"] + size > self.max_bytes()):
+            self.rollover()
+            shard = self.shards[self.active]
+        shard["rows"] += 1
+        shard["bytes"] += size
+        pending = self.pending.setdefault(self.active, {"rows": 0, "bytes": 0})
+        pending["rows"] += 1
+        pending["bytes"] += size
+        return int(os.path.splitext(self.active)[0].replace("db", ""))
+
+    def rollover(self):
+        if self.active is not None:
+            self.shards[self.active]["sealed"] = True
+            self.pending.setdefault(self.active, {"rows": 0, "bytes": 0})
+        self.active = self.pick()
+        if self.active is None:
+            filename = ShardingManager.create_new_database()
+            self.shards[filename] = {
+                "rows": 0,
+                "bytes": self.file_size(filename),
+                "sealed": False,
+            }
+            self.pending[filename] = {"rows": 0, "bytes": 0}
+            self.active = filename
+            if self.on_create:
+                self.on_create(filename)
+
+    def save(self, *args):
+        """Persist the pending counters once the posts are committed."""
+        if not self.pending:
+            return
+        conn = self.connect()
+        for filename, pending in self.pending.items():
+            conn.execute(
+                f"INSERT OR IGNORE INTO {self.TABLE} (name, rows, bytes) VALUES (?, 0, 0)",
+                (filename,),
+            )
+            conn.execute(
+                f"""
+                UPDATE {self.TABLE} SET rows = rows + ?, bytes = bytes + ?, sealed = ?
+                WHERE name = ?
+                """,
+                (pending["rows"], pending["bytes"], self.shards[filename]["sealed"], filename),
+            )
+        conn.commit()
+        conn.close()
+        self.pending = {}
+
+    def discard(self, *args):
+        """Forget the counters of rolled back posts, shards created meanwhile stay registered."""
+        for filename, pending in self.pending.items():
+            self.shards[filename]["rows"] -= pending["rows"]
+            self.shards[filename]["bytes"] -= pending["bytes"]
+            pending["rows"] = pending["bytes"] = 0
 
 
 class OrderBy(Enum):
@@ -123,31 +503,87 @@ class OrderBy(Enum):
 
 
 class DatabaseManager:
-    def __init__(self):
-        engine = create_engine(f"sqlite:///db/{ShardingManager.DB1_NAME}")
-        event.listen(engine, "connect", ShardingManager.attach_databases)
-        self.Session = sessionmaker(bind=engine)
+    COLUMNS = [column.name for column in inspect(Post).c]
+    # what page-item.html and sitemap.xml use, in idx_posts_listing order
+    LISTING_COLUMNS = ["date", "uuid", "title", "path", "image", "db"]
+
+    def __init__(self, profile: str = "build"):
+        self.profile = profile
+        self.Session = sessionmaker(bind=get_engine(profile))
         self.session = self.Session()
-        event.listen(self.session, "after_commit", ShardingManager.manage_database_size)
+        # set by `ssg build --profile` to time the reads of every shard
+        self.profiler = None
+        self._registry = None
+
+    @property
+    def registry(self) -> ShardRegistry:
+        # loaded by the first write, read-only commands never touch it
+        if self._registry is None:
+            self._registry = ShardRegistry(
+                on_create=lambda filename: ShardingManager.attach_database(
+                    self.session, filename, get_pragmas(self.profile)
+                )
+            )
+            event.listen(self.session, "after_commit", self._registry.save)
+            event.listen(self.session, "after_soft_rollback", self._registry.discard)
+        return self._registry
 
     def new_post(self, title, content, content_format, path, extra, date, image):
-        smallest_db = ShardingManager.get_smallest_db()
-        return Post(
-            uuid=str(uuid.uuid4()),
-            title=title,
-            content=content,
-            content_format=content_format,
-            path=path,
-            extra=extra,
-            date=date,
-            image=image,
-            # would be nice do it better, but sqlalchemy orm has no support
-            db=int(smallest_db.replace("db", "")),
-        )
+        fields = {
+            "uuid": str(uuid.uuid4()),
+            "title": title,
+            "content": content,
+            "content_format": content_format,
+            "path": path,
+            "extra": extra,
+            "date": date,
+            "image": image,
+        }
+        # would be nice do it better, but sqlalchemy orm has no support
+        return Post(db=self.registry.route(fields), **fields)
+
+    def add_posts(self, posts: list[Post]):
+        """Insert `posts` in the shard each one was routed to, in the session transaction.
+
+        Post is mapped on the posts table of db1 only, the posts of every other shard (and of a
+        batch that rolled over to a new one) are inserted here."""
+        columns = ", ".join(self.COLUMNS)
+        placeholders = ", ".join(f":{column}" for column in self.COLUMNS)
+        for db, shard_posts in itertools.groupby(
+            sorted(posts, key=lambda post: post.db), key=lambda post: post.db
+        ):
+            table_name = ShardingManager._get_posts_table_by_db(f"db{db}.sqlite")
+            self.session.execute(
+                text(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"),
+                [post.to_dict() for post in shard_posts],
+            )
+
+    def count_posts_by_shard(self) -> dict[str, int]:
+        connection = self.session.connection().connection.driver_connection
+        return {
+            filename: ShardingManager.count_posts(
+                connection,
+                "main" if filename == ShardingManager.DB1_NAME else os.path.splitext(filename)[0],
+            )
+            for filename in ShardingManager.get_databases()
+        }
 
     def count_total_posts(self):
-        union_query = ShardingManager.generate_union_posts_query(fields="title, content")
-        return self.session.execute(text(f"SELECT COUNT(*) FROM ({union_query})")).fetchone()[0]
+        return sum(self.count_posts_by_shard().values())
+
+    def get_post_by_path(self, paths: list[str]) -> Post | None:
+        """The first post stored under one of `paths`, looked up shard by shard."""
+        parameters = {f"path{idx}": path for idx, path in enumerate(paths)}
+        placeholders = ", ".join(f":{name}" for name in parameters)
+        for filename in ShardingManager.get_databases():
+            table_name = ShardingManager._get_posts_table_by_db(filename)
+            query = f"""
+                SELECT {", ".join(self.COLUMNS)} FROM {table_name}
+                WHERE path IN ({placeholders}) LIMIT 1
+            """
+            if row := self.session.execute(text(query), parameters).fetchone():
+                return self.map_posts([row], columns=self.COLUMNS)[0]
+        return None
 
     def get_posts(
         self,
@@ -157,79 +593,160 @@ class DatabaseManager:
         filters: list = None,
         exclude_filters: list = None,
     ):
-        filters = filters or []
-        exclude_filters = exclude_filters or []
+        """One page of posts ordered by (date, uuid) across every shard.
 
+        Every shard streams its own ordered slice of at most `page * limit` keys, read from
+        idx_posts_listing with the filters pushed down, and the streams are merged lazily with a
+        heap, so no shard reads further than the page needs and the union is never sorted. Only
+        the posts of the page are read in full."""
+        where_clause, parameters = self._filters_clause(filters, exclude_filters)
         offset = (page - 1) * limit
-        union_query = ShardingManager.generate_union_posts_query()
-
-        where_clauses = []
-        exclude_clauses = []
+        parameters["limit"] = offset + limit
+        # plain DB-API cursors: sqlite steps each one only as far as the merge pulls it
+        connection = self.session.connection().connection.driver_connection
+        streams = []
+        for filename in ShardingManager.get_databases():
+            query = f"""
+                SELECT date, uuid, db FROM {ShardingManager._get_posts_table_by_db(filename)}
+                WHERE {where_clause}
+                ORDER BY date {order_by.value}, uuid {order_by.value}
+                LIMIT :limit
+            """
+            streams.append(connection.execute(query, parameters))
+        keys = heapq.merge(
+            *streams,
+            key=lambda key: (key[0] is not None, key[0] or "", key[1]),
+            reverse=order_by == OrderBy.DESC,
+        )
+        keys = list(itertools.islice(keys, offset, offset + limit))
+        for stream in streams:
+            stream.close()
+        return self._get_posts_by_keys(keys)
+
+    def _get_posts_by_keys(self, keys: list[tuple]) -> list:
+        """Full rows of the (date, uuid, db) `keys`, in their order."""
+        if not keys:
+            return []
+        queries = []
         parameters = {}
+        by_db = sorted(keys, key=lambda key: key[2])
+        for db, shard_keys in itertools.groupby(by_db, key=lambda key: key[2]):
+            names = []
+            for _, post_uuid, _ in shard_keys:
+                names.append(f":uuid{len(parameters)}")
+                parameters[f"uuid{len(parameters)}"] = post_uuid
+            queries.append(
+                f"SELECT {', '.join(self.COLUMNS)} "
+                f"FROM {ShardingManager._get_posts_table_by_db(f'db{db}.sqlite')} "
+                f"WHERE uuid IN ({', '.join(names)})"
+            )
+        rows = self.session.execute(text(" UNION ALL ".join(queries)), parameters)
+        posts = {row.uuid: row for row in rows}
+        return [posts[key[1]] for key in keys]
 
-        for filter in filters:
+    @staticmethod
+    def _filters_clause(filters: list = None, exclude_filters: list = None) -> tuple[str, dict]:
+        clauses = []
+        parameters = {}
+        for filter in filters or []:
             for field, value in filter.items():
                 if field == "extra":
-                    where_clauses.append(f"{field} LIKE :{field}")
+                    clauses.append(f"{field} LIKE :{field}")
                     parameters[field] = f"%{value}%"
                 else:
-                    where_clauses.append(f"{field} = :{field}")
+                    clauses.append(f"{field} = :{field}")
                     parameters[field] = value
 
-        for filter in exclude_filters:
+        for filter in exclude_filters or []:
             for field, value in filter.items():
                 if field == "extra":
-                    exclude_clauses.append(f"{field} NOT LIKE :exclude_{field}")
+                    clauses.append(f"{field} NOT LIKE :exclude_{field}")
                     parameters[f"exclude_{field}"] = f"%{value}%"
                 else:
-                    exclude_clauses.append(f"{field} != :exclude_{field}")
+                    clauses.append(f"{field} != :exclude_{field}")
                     parameters[f"exclude_{field}"] = value
 
-        where_clause = (
-            " AND ".join(where_clauses + exclude_clauses)
-            if where_clauses or exclude_clauses
-            else "1=1"
-        )
+        return " AND ".join(clauses) or "1=1", parameters
 
-        query = f"""
-            SELECT * FROM ({union_query}) AS all_posts
-            WHERE {where_clause}
-            ORDER BY date {order_by.value}
-            LIMIT :limit OFFSET :offset
-        """
-
-        parameters["limit"] = limit
-        parameters["offset"] = offset
-
-        result = self.session.execute(text(query), parameters)
-        return result.fetchall()
-
-    def _fetch_pagination_mapped(self, offset: int = 0, limit: int = 200):
-        union_query = ShardingManager.generate_union_posts_query()
-        query = f"SELECT * FROM ({union_query}) AS all_posts LIMIT :limit OFFSET :offset"
-        result = self.session.execute(text(query), {"limit": limit, "offset": offset})
-        posts = result.fetchall()
-        return DatabaseManager.map_posts(posts)
+    @staticmethod
+    def _keyset_segments(order_by: OrderBy) -> list[tuple[str, str]]:
+        # NULL dates sort first in SQLite: they get their own segment, opening an ASC walk and
+        # closing a DESC one, so every batch stays a plain range scan on idx_posts_listing
+        op = ">" if order_by == OrderBy.ASC else "<"
+        undated = ("date IS NULL", f"date IS NULL AND uuid {op} :uuid")
+        dated = ("date IS NOT NULL", f"(date, uuid) {op} (:date, :uuid)")
+        return [undated, dated] if order_by == OrderBy.ASC else [dated, undated]
 
-    def generator_page_posts(self, total_by_page: int = 200, max_posts_server: int = None):
-        total = self.count_total_posts()
-        fetched = 0
-        offset = 0
+    @staticmethod
+    def _projection(columns: list = None) -> list[str]:
+        # keyset columns and db (needed to build a Post) are always selected
+        if not columns:
+            return DatabaseManager.COLUMNS
+        selected = set(columns) | {"date", "uuid", "db"}
+        return [column for column in DatabaseManager.COLUMNS if column in selected]
+
+    def _iter_shard_keyset(
+        self, filename: str, order_by: OrderBy, batch_size: int, columns: list[str]
+    ):
+        table_name = ShardingManager._get_posts_table_by_db(filename)
+        date_idx, uuid_idx = columns.index("date"), columns.index("uuid")
+
+        for where_clause, next_where_clause in self._keyset_segments(order_by):
+            parameters = {"limit": batch_size}
+            while True:
+                query = f"""
+                    SELECT {", ".join(columns)} FROM {table_name}
+                    WHERE {where_clause}
+                    ORDER BY date {order_by.value}, uuid {order_by.value}
+                    LIMIT :limit
+                """
+                started = time.perf_counter()
+                rows = self.session.execute(text(query), parameters).fetchall()
+                if self.profiler:
+                    self.profiler.add_shard_read(filename, time.perf_counter() - started, len(rows))
+                yield from rows
+                if len(rows) < batch_size:
+                    break
+                where_clause = next_where_clause
+                parameters.update({"date": rows[-1][date_idx], "uuid": rows[-1][uuid_idx]})
+
+    def iter_posts(
+        self, order_by: OrderBy = OrderBy.DESC, batch_size: int = 200, columns: list = None
+    ):
+        """Yield every post row ordered by (date, uuid), resuming each shard from its last key.
+        Rows hold `DatabaseManager._projection(columns)`, every column by default."""
+        columns = self._projection(columns)
+        date_idx, uuid_idx = columns.index("date"), columns.index("uuid")
+        streams = [
+            self._iter_shard_keyset(filename, order_by, batch_size, columns)
+            for filename in ShardingManager.get_databases()
+        ]
+        yield from heapq.merge(
+            *streams,
+            key=lambda row: (row[date_idx] is not None, row[date_idx] or "", row[uuid_idx]),
+            reverse=order_by == OrderBy.DESC,
+        )
 
+    def generator_page_posts(
+        self,
+        total_by_page: int = 200,
+        max_posts_server: int = None,
+        order_by: OrderBy = OrderBy.DESC,
+        columns: list = None,
+    ):
         if max_posts_server and total_by_page >= max_posts_server:
             total_by_page = max_posts_server
 
-        while fetched < total:
-            posts = self._fetch_pagination_mapped(offset=offset, limit=total_by_page)
-            fetched += len(posts)
-            offset = offset + total_by_page
-            yield posts
-            if max_posts_server and fetched >= max_posts_server:
-                break
+        rows = self.iter_posts(order_by=order_by, batch_size=total_by_page, columns=columns)
+        if max_posts_server:
+            rows = itertools.islice(rows, max_posts_server)
+
+        while page := list(itertools.islice(rows, total_by_page)):
+            yield DatabaseManager.map_posts(page, columns=self._projection(columns))
 
     @staticmethod
-    def map_posts(posts) -> Post:
-        columns = [column.name for column in inspect(Post).c]
+    def map_posts(posts, columns: list = None) -> Post:
+        columns = columns or [column.name for column in inspect(Post).c]
         posts_dicts = []
         for post_tuple in posts:
             post_dict = {}
@@ -237,3 +754,82 @@ class DatabaseManager:
                 post_dict[column] = post_tuple[idx]
             posts_dicts.append(post_dict)
         return [Post(**post_dict) for post_dict in posts_dicts]
+
+
+class ShardReader:
+    """Build-time reader: streams every shard on its own read-only connection, one thread per
+    shard, so reads of the separate shard files overlap instead of going through one UNION."""
+
+    def __init__(self, batch_size: int = 1000, queued_batches_by_shard: int = 2, profiler=None):
+        self.batch_size = batch_size
+        self.queued_batches_by_shard = queued_batches_by_shard
+        self.profiler = profiler
+        self.pragmas = get_pragmas("build")
+
+    def _read_shard(self, filename: str, batches: queue.Queue, stop: threading.Event):
+        try:
+            conn = sqlite3.connect(f"file:db/{filename}?mode=ro", uri=True)
+            ShardingManager.apply_pragmas(conn, self.pragmas)
+            try:
+                started = time.perf_counter()
+                cursor = conn.execute(f"SELECT {', '.join(DatabaseManager.COLUMNS)} FROM posts")
+                while not stop.is_set() and (rows := cursor.fetchmany(self.batch_size)):
+                    if self.profiler:
+                        self.profiler.add_shard_read(
+                            filename, time.perf_counter() - started, len(rows)
+                        )
+                    self._put(batches, rows, stop)
+                    started = time.perf_counter()
+            finally:
+                conn.close()
+        except Exception as e:
+            self._put(batches, e, stop)
+        finally:
+            self._put(batches, None, stop)
+
+    @staticmethod
+    def _put(batches: queue.Queue, item, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def generator_page_posts(self, max_posts: int = None):
+        """Yield batches of posts in arrival order (unordered) from all shards in parallel."""
+        databases = ShardingManager.get_databases()
+        batches = queue.Queue(maxsize=max(len(databases), 1) * self.queued_batches_by_shard)
+        stop = threading.Event()
+        readers = [
+            threading.Thread(
+                target=self._read_shard,
+                args=(filename, batches, stop),
+                name=f"coeur-{os.path.splitext(filename)[0]}",
+                daemon=True,
+            )
+            for filename in databases
+        ]
+        for reader in readers:
+            reader.start()
+
+        running = len(readers)
+        fetched = 0
+        try:
+            while running:
+                rows = batches.get()
+                if rows is None:
+                    running -= 1
+                    continue
+                if isinstance(rows, Exception):
+                    raise rows
+                if max_posts:
+                    rows = rows[: max_posts - fetched]
+                fetched += len(rows)
+                yield DatabaseManager.map_posts(rows)
+                if max_posts and fetched >= max_posts:
+                    break
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
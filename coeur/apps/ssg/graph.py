@@ -0,0 +1,60 @@
+"""
+Dependency graph of the Jinja templates (extends, include and import), used to know which
+build stages a template edit affects and to hash only the templates behind each output kind.
+"""
+
+import hashlib
+import os
+
+from jinja2 import Environment, FileSystemLoader, TemplateSyntaxError, meta
+
+
+class TemplateGraph:
+    def __init__(self, template_folder: str):
+        self.template_folder = template_folder
+        self.environment = Environment(loader=FileSystemLoader(searchpath=template_folder))
+        self.dependencies = {}
+        for name in self.environment.list_templates(
+            filter_func=lambda name: not name.startswith("static/")
+        ):
+            source = self.environment.loader.get_source(self.environment, name)[0]
+            try:
+                references = list(meta.find_referenced_templates(self.environment.parse(source)))
+            except TemplateSyntaxError:
+                references = []
+            # a dynamic reference (None) may point anywhere
+            if None in references:
+                self.dependencies[name] = None
+            else:
+                self.dependencies[name] = set(references)
+
+    def closure(self, name: str) -> set[str]:
+        """`name` and every template it extends, includes or imports, directly or not."""
+        seen = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            dependencies = self.dependencies.get(current, set())
+            if dependencies is None:
+                return set(self.dependencies)
+            pending.extend(dependencies)
+        return seen
+
+    def affected(self, roots, changed) -> set[str]:
+        """The roots whose closure holds one of the `changed` template names."""
+        changed = set(changed)
+        return {root for root in roots if self.closure(root) & changed}
+
+    def digest(self, name: str) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        for dependency in sorted(self.closure(name)):
+            path = os.path.join(self.template_folder, dependency)
+            if not os.path.isfile(path):
+                continue
+            hasher.update(dependency.encode())
+            with open(path, "rb") as file:
+                hasher.update(file.read())
+        return hasher.hexdigest()
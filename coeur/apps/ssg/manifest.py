@@ -0,0 +1,102 @@
+"""
+Build manifest for incremental builds: stores a digest of the inputs behind every output
+so that `ssg build` only renders and writes what changed since the previous build.
+"""
+
+import hashlib
+import json
+import os
+
+
+class BuildManifest:
+    VERSION = 1
+    FILENAME = "build-manifest.json"
+
+    def __init__(self, cache_folder: str, inputs_digest: str, incremental: bool = True):
+        self.path = os.path.join(cache_folder, self.FILENAME)
+        self.inputs_digest = inputs_digest
+        self.meta = {}
+        self.previous_meta = {}
+        self.previous = self.load() if incremental else {}
+        self.current = {}
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.previous)
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != self.VERSION:
+            return {}
+        self.previous_meta = data.get("meta", {})
+        return data.get("groups", {})
+
+    def reset(self) -> None:
+        self.previous = {}
+        self.previous_meta = {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "inputs": self.inputs_digest,
+                    "meta": self.meta,
+                    "groups": self.current,
+                },
+                file,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+
+    def digest(self, *parts) -> str:
+        hasher = hashlib.blake2b(self.inputs_digest.encode(), digest_size=16)
+        for part in parts:
+            hasher.update(b"\x1f")
+            hasher.update(("" if part is None else str(part)).encode())
+        return hasher.hexdigest()
+
+    def is_fresh(self, group: str, key: str, digest: str) -> bool:
+        """Tell if `key` was built from the same inputs last time, keeping it in the manifest if so."""
+        fresh = self.previous.get(group, {}).get(key) == digest
+        if fresh:
+            self.record(group, key, digest)
+        return fresh
+
+    def record(self, group: str, key: str, digest: str) -> None:
+        self.current.setdefault(group, {})[key] = digest
+
+    def keep(self, group: str) -> None:
+        """Carry the previous entries of a group that is not rebuilt this time."""
+        self.current[group] = dict(self.previous.get(group, {}))
+
+    def keys(self, group: str):
+        return self.current.get(group, {}).keys()
+
+    def stale(self, group: str) -> list[str]:
+        """Keys present in the previous build that were not produced by the current one."""
+        current = self.current.get(group, {})
+        return [key for key in self.previous.get(group, {}) if key not in current]
+
+    @staticmethod
+    def hash_files(*paths: str, exclude: tuple = ()) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            if os.path.isfile(path):
+                files = [path]
+            else:
+                files = []
+                for root, dirs, filenames in os.walk(path):
+                    dirs[:] = sorted(d for d in dirs if d not in exclude)
+                    files.extend(os.path.join(root, name) for name in sorted(filenames))
+            for file_path in files:
+                hasher.update(os.path.relpath(file_path, path).encode())
+                with open(file_path, "rb") as file:
+                    hasher.update(file.read())
+        return hasher.hexdigest()
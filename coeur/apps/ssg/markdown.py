@@ -42,7 +42,7 @@ class MarkdownHandler:
     def bulk_create_db_post(base_directory: str, batch: list[str]):
         posts = []
         errors = []
-        db = DatabaseManager()
+        db = DatabaseManager(profile="import")
         for file_path in batch:
             with open(file_path, "r") as content:
                 try:
@@ -63,7 +63,7 @@ class MarkdownHandler:
                 finally:
                     benchmark.increase()
         try:
-            db.session.bulk_save_objects(posts)
+            db.add_posts(posts)
             db.session.commit()
             db.session.close()
         except Exception as e:
@@ -0,0 +1,199 @@
+"""
+On-demand rendering for `ssg serve --lazy`: nothing is built up front, every request is resolved
+by path against the database and rendered with post.html or page.html. Rendered responses are
+kept in an LRU cache, dropped as soon as a template, config.toml or a database file changes.
+"""
+
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit
+import functools
+import glob
+import itertools
+import os
+import re
+import threading
+
+from coeur.apps.ssg.build import BuildHandler, Pagination
+from coeur.apps.ssg.db import DatabaseManager, OrderBy
+from coeur.utils import HttpHandler
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key, value) -> None:
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.items.clear()
+
+
+class OnDemandRequestHandler(HttpHandler.CustomHTTPRequestHandler):
+    """Serves the template static files as they are and renders everything else."""
+
+    def __init__(self, *args, server=None, **kwargs):
+        self.coeur_server = server
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def respond(self, head: bool) -> None:
+        if os.path.isfile(self.translate_path(self.path)):
+            return super().do_HEAD() if head else super().do_GET()
+        try:
+            html = self.coeur_server.response(self.path)
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        if html is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(html)
+
+
+class OnDemandServer:
+    PAGE_PATH = re.compile(r"/page/(\d+)")
+
+    def __init__(self, build: BuildHandler, cache_size: int = 256):
+        self.build = build
+        self.settings = build.settings
+        self.cache = LRUCache(cache_size)
+        self.lock = threading.Lock()
+        self.stamp = self.inputs_stamp()
+
+    def inputs_stamp(self) -> tuple:
+        # only stat calls, so it is cheap enough to check on every request
+        static_folder = os.path.join(self.settings.template_folder, "static")
+        # WAL readers write the -shm index, only the database and -wal files tell about changes
+        databases = [path for path in glob.glob("db/*.sqlite*") if not path.endswith("-shm")]
+        paths = [self.settings.config_path, *databases]
+        for root, dirs, filenames in os.walk(self.settings.template_folder):
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != static_folder]
+            paths.extend(os.path.join(root, name) for name in filenames)
+
+        stamp = []
+        for path in sorted(paths):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamp.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def refresh(self) -> None:
+        stamp = self.inputs_stamp()
+        with self.lock:
+            if stamp == self.stamp:
+                return
+            self.settings.reload()
+            self.cache.clear()
+            self.stamp = stamp
+
+    def response(self, path: str) -> bytes | None:
+        """The rendered page for a request path, None when nothing lives there."""
+        self.refresh()
+        path = unquote(urlsplit(path).path)
+        if (html := self.cache.get(path)) is not None:
+            return html
+        if (html := self.render(path)) is None:
+            return None
+        html = html.encode()
+        self.cache.set(path, html)
+        return html
+
+    def render(self, path: str) -> str | None:
+        base = path.removesuffix("index.html").rstrip("/")
+        # every request runs on its own thread, its session goes back to the pool when it ends
+        db = DatabaseManager()
+        try:
+            if not base:
+                return self.render_listing(db, None)
+            if match := self.PAGE_PATH.fullmatch(base):
+                return self.render_listing(db, int(match.group(1)))
+            return self.render_post(db, base)
+        finally:
+            db.session.close()
+
+    def render_post(self, db: DatabaseManager, base: str) -> str | None:
+        paths = [base, f"{base}/"]
+        for variation in self.settings.get_seo_variations_path():
+            if base.endswith(f"-{variation}"):
+                canonical = base.removesuffix(f"-{variation}")
+                paths.extend((canonical, f"{canonical}/"))
+        if post := db.get_post_by_path(paths):
+            return self.build.render_post(post)
+        return None
+
+    def listing_posts(
+        self, db: DatabaseManager, order_by: OrderBy, offset: int, limit: int
+    ) -> list:
+        rows = db.iter_posts(
+            order_by=order_by,
+            batch_size=min(offset + limit, self.settings.posts_db_pagination),
+            columns=DatabaseManager.LISTING_COLUMNS,
+        )
+        return DatabaseManager.map_posts(
+            list(itertools.islice(rows, offset, offset + limit)),
+            columns=DatabaseManager._projection(DatabaseManager.LISTING_COLUMNS),
+        )
+
+    def render_listing(self, db: DatabaseManager, page: int | None) -> str | None:
+        """Render index.html (`page` None) or /page/N/ the same way `ssg build` lays them out."""
+        per_page = self.settings.posts_pagination
+        pagination = self.settings.get_build_option("pagination", Pagination.NEWEST.value)
+
+        if pagination == Pagination.STABLE.value:
+            full_pages = db.count_total_posts() // per_page
+            if page is None:
+                posts = self.listing_posts(db, OrderBy.DESC, 0, per_page)
+                return self.build.render_listing_page(
+                    posts, self.build.stable_navigation(full_pages + 1, full_pages)
+                )
+            if not 1 <= page <= full_pages:
+                return None
+            posts = self.listing_posts(db, OrderBy.ASC, (page - 1) * per_page, per_page)[::-1]
+            return self.build.render_listing_page(
+                posts, self.build.stable_navigation(page, full_pages)
+            )
+
+        page = page or 1
+        posts = self.listing_posts(db, OrderBy.DESC, (page - 1) * per_page, per_page)
+        if not posts and page > 1:
+            return None
+        return self.build.render_listing_page(posts, self.build.listing_navigation(page))
+
+    def serve(self, port: int):
+        handler = HttpHandler(
+            os.path.join(self.settings.template_folder, "static"),
+            port=port,
+            request_handler=functools.partial(OnDemandRequestHandler, server=self),
+        )
+        try:
+            handler.serve_forever()
+        except KeyboardInterrupt:
+            self.settings.coeur_thread_ex.shutdown()
+            handler.shutdown()
@@ -0,0 +1,98 @@
+"""
+Output helpers for the build: the file writer and the precompressed siblings of its files.
+"""
+
+import gzip
+import os
+import tempfile
+
+
+class OutputWriter:
+    """Writes build outputs as bytes. Folders already created are remembered, and files whose
+    content is already on disk are left untouched: no write and a stable mtime for rsync."""
+
+    def __init__(self, root_folder: str, atomic: bool = False):
+        self.root_folder = root_folder
+        self.atomic = atomic
+        self.folders = set()
+
+    def path(self, path: str) -> str:
+        return os.path.normpath(f"{self.root_folder}/{path}")
+
+    def write(self, path: str, data: bytes) -> bool:
+        """Write `data` at `path` (relative to the root folder), returning False when unchanged."""
+        file_path = self.path(path)
+        folder = os.path.dirname(file_path)
+        if folder not in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.folders.add(folder)
+
+        if self.is_identical(file_path, data):
+            return False
+        self.write_file(file_path, data, self.atomic)
+        return True
+
+    @staticmethod
+    def write_file(file_path: str, data: bytes, atomic: bool = False) -> None:
+        """Write `data` at `file_path`, through a temporary file renamed in place when `atomic`,
+        so a reader never sees a half-written file."""
+        if not atomic:
+            with open(file_path, "wb") as file:
+                file.write(data)
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def is_identical(file_path: str, data: bytes) -> bool:
+        try:
+            if os.stat(file_path).st_size != len(data):
+                return False
+            with open(file_path, "rb") as file:
+                return file.read() == data
+        except FileNotFoundError:
+            return False
+
+
+class Precompressor:
+    """Writes `.gz` (and `.br`/`.zst` when brotli/zstandard are installed) next to the HTML and
+    XML outputs, so nginx `gzip_static`-style servers and CDNs can serve them as they are."""
+
+    EXTENSIONS = (".html", ".xml")
+    SIBLINGS = (".gz", ".br", ".zst")
+
+    def __init__(self, atomic: bool = False):
+        # siblings are written like the files they compress (see OutputWriter.atomic)
+        self.atomic = atomic
+        self.codecs = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+        try:
+            import brotli
+
+            self.codecs[".br"] = lambda data: brotli.compress(data, quality=9)
+        except ImportError:
+            ...
+        try:
+            import zstandard
+
+            # compressor objects are not thread safe, one per call
+            self.codecs[".zst"] = lambda data: zstandard.ZstdCompressor(level=12).compress(data)
+        except ImportError:
+            ...
+
+    @property
+    def siblings(self) -> list[str]:
+        return list(self.codecs)
+
+    def accepts(self, path: str) -> bool:
+        return path.endswith(self.EXTENSIONS)
+
+    def compress(self, file_path: str, data: bytes) -> None:
+        for extension, codec in self.codecs.items():
+            OutputWriter.write_file(f"{file_path}{extension}", codec(data), self.atomic)
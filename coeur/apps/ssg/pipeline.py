@@ -0,0 +1,92 @@
+"""
+Single-scan build: one pass over the posts feeds every stage that needs them at the same time,
+each stage running on its own thread behind a bounded queue so a slow stage holds the reader
+back instead of piling batches up in memory. Stages reading different columns get a pipeline
+each, and the pipelines run side by side (see `BuildPipeline.run_all`).
+"""
+
+import queue
+import threading
+
+_DONE = object()
+
+
+class BuildPipeline:
+    def __init__(self, posts_batches, queue_size: int = 4):
+        self.posts_batches = posts_batches
+        self.queue_size = queue_size
+
+    @staticmethod
+    def _consume(batches: queue.Queue):
+        while (batch := batches.get()) is not _DONE:
+            yield batch
+
+    def _run_stage(self, stage, batches: queue.Queue, errors: list):
+        try:
+            stage(self._consume(batches))
+        except Exception as e:
+            errors.append(e)
+
+    @staticmethod
+    def _put(batches: queue.Queue, item, worker: threading.Thread):
+        # a stage that failed stops consuming, it must not block the others
+        while worker.is_alive():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run(self, *stages) -> None:
+        """Run every `stage(posts_batches)` over the same single read of the posts."""
+        errors = []
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        workers = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, batches, errors),
+                name=f"coeur-stage-{index}",
+                daemon=True,
+            )
+            for index, (stage, batches) in enumerate(zip(stages, queues))
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for batch in self.posts_batches:
+                for batches, worker in zip(queues, workers):
+                    self._put(batches, batch, worker)
+        finally:
+            for batches, worker in zip(queues, workers):
+                self._put(batches, _DONE, worker)
+            for worker in workers:
+                worker.join()
+
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def run_all(*pipelines) -> None:
+        """Run `(pipeline, stages)` pairs at the same time, each over its own read."""
+        errors = []
+
+        def run(pipeline, stages):
+            try:
+                pipeline.run(*stages)
+            except Exception as e:
+                errors.append(e)
+
+        workers = [
+            threading.Thread(
+                target=run, args=(pipeline, stages), name=f"coeur-pipeline-{index}", daemon=True
+            )
+            for index, (pipeline, stages) in enumerate(pipelines)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            raise errors[0]
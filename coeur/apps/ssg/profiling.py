@@ -0,0 +1,158 @@
+"""
+Build profiling for `ssg build --profile`: wall and CPU time per stage, read time per shard,
+Markdown/Jinja/minify/write time per post, RSS over time and write throughput, saved as JSON.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import heapq
+import json
+import os
+import threading
+import time
+
+import psutil
+
+
+class BuildProfiler:
+    FILENAME = "build-profile.json"
+    PHASES = ("markdown", "jinja", "minify", "write")
+
+    def __init__(self, slowest: int = 20, interval: float = 0.5):
+        self.slowest = slowest
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.lock = threading.Lock()
+        self.stages = {}
+        # seconds of the posts rendered by worker processes, by stage, process_time misses them
+        self.worker_cpu = {}
+        self.current = threading.local()
+        self.shards = {}
+        self.posts = 0
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.slowest_posts = []
+        self.files = 0
+        self.bytes = 0
+        self.timeline = []
+        self.stop_sampling = threading.Event()
+        self.sampler = None
+
+    def start(self) -> None:
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.start_time = time.perf_counter()
+        self.start_times = os.times()
+        self.sampler = threading.Thread(target=self._sample, name="coeur-profiler", daemon=True)
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.wall_time = time.perf_counter() - self.start_time
+        times = os.times()
+        self.cpu_times = {
+            field: getattr(times, field) - getattr(self.start_times, field)
+            for field in ("user", "system", "children_user", "children_system")
+        }
+        self.stop_sampling.set()
+        self.sampler.join()
+
+    def _rss(self) -> int:
+        # render worker processes are included, they hold most of the memory of a build
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                ...
+        return rss
+
+    def _sample(self) -> None:
+        while True:
+            self.timeline.append((time.perf_counter() - self.start_time, self._rss()))
+            if self.stop_sampling.wait(self.interval):
+                return
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a build stage. CPU time is the one of the whole process while the stage runs,
+        render threads included, plus the time of the posts rendered by worker processes; the
+        stages the pipeline runs side by side share the process part."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.current.stage = name
+        try:
+            yield
+        finally:
+            self.current.stage = None
+            with self.lock:
+                self.stages[name] = {
+                    "wall": time.perf_counter() - wall,
+                    "cpu": time.process_time() - cpu + self.worker_cpu.get(name, 0.0),
+                }
+
+    def add_shard_read(self, shard: str, seconds: float, rows: int) -> None:
+        with self.lock:
+            stats = self.shards.setdefault(shard, {"seconds": 0.0, "rows": 0, "queries": 0})
+            stats["seconds"] += seconds
+            stats["rows"] += rows
+            stats["queries"] += 1
+
+    def add_post(self, path: str, timings: dict, worker: bool = False) -> None:
+        """Count a rendered post, `worker` when a worker process rendered it: its phases are
+        then added to the CPU time of the stage collecting it, a worker renders one at a time."""
+        total = sum(timings[phase] for phase in self.PHASES)
+        stage = getattr(self.current, "stage", None)
+        with self.lock:
+            if worker and stage:
+                self.worker_cpu[stage] = self.worker_cpu.get(stage, 0.0) + total
+            self.posts += 1
+            for phase in self.PHASES:
+                self.phases[phase] += timings[phase]
+            self.files += timings["files"]
+            self.bytes += timings["bytes"]
+            entry = (total, path, {phase: timings[phase] for phase in self.PHASES})
+            if len(self.slowest_posts) < self.slowest:
+                heapq.heappush(self.slowest_posts, entry)
+            elif total > self.slowest_posts[0][0]:
+                heapq.heapreplace(self.slowest_posts, entry)
+
+    def add_write(self, size: int) -> None:
+        if not size:
+            return
+        with self.lock:
+            self.files += 1
+            self.bytes += size
+
+    def report(self) -> dict:
+        megabytes = 1024 * 1024
+        return {
+            "started_at": self.started_at,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_times,
+            "stages": self.stages,
+            "shards": self.shards,
+            "posts": {
+                "rendered": self.posts,
+                "phases": self.phases,
+                "slowest": [
+                    {"path": path, "total": total, **phases}
+                    for total, path, phases in sorted(self.slowest_posts, reverse=True)
+                ],
+            },
+            "writes": {
+                "files": self.files,
+                "bytes": self.bytes,
+                "files_per_second": self.files / self.wall_time if self.wall_time else 0,
+                "mb_per_second": self.bytes / megabytes / self.wall_time if self.wall_time else 0,
+            },
+            "memory": {
+                "peak_rss_mb": max((rss for _, rss in self.timeline), default=0) / megabytes,
+                "timeline": [
+                    [round(elapsed, 3), round(rss / megabytes, 2)] for elapsed, rss in self.timeline
+                ],
+            },
+        }
+
+    def save(self, folder: str) -> str:
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, self.FILENAME)
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+        return path
@@ -0,0 +1,159 @@
+"""
+Render backends for single posts. The thread backend renders inside the build process, the
+process backend sends batches of post rows to worker processes that load their own templates,
+so Markdown, Jinja and minification scale with the available cores.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from enum import Enum
+import hashlib
+import itertools
+import multiprocessing
+import os
+import sqlite3
+import threading
+
+from coeur.apps.ssg.db import ContentFormat, Post
+from coeur.utils import CACHE_FOLDER
+
+import mistune
+
+_worker = None
+
+
+class RenderBackend(Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+def _init_worker():
+    global _worker
+    from coeur.apps.ssg.build import BuildHandler
+
+    _worker = BuildHandler()
+
+
+def _render_batch(jobs: list[tuple[dict, str]]) -> list[tuple[str, str, str | None, dict]]:
+    results = []
+    for row, digest in jobs:
+        try:
+            timings = _worker.write_post(Post(**row))
+            results.append((row["path"], digest, None, timings))
+        except Exception as e:
+            results.append((row["path"], digest, str(e), None))
+    return results
+
+
+class ProcessRenderEngine:
+    MAX_BATCH_SIZE = 200
+
+    def __init__(self, workers: int, max_in_flight: int = 256):
+        self.workers = workers
+        # batches small enough to keep two per worker within the window
+        self.batch_size = max(1, min(self.MAX_BATCH_SIZE, max_in_flight // (workers * 2)))
+        self.max_batches = max(1, max_in_flight // self.batch_size)
+        self.executor = None
+
+    def __enter__(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        return self
+
+    def __exit__(self, *args):
+        self.executor.shutdown()
+
+    def render(self, jobs):
+        """Render `(row, digest)` jobs in batches, yielding `(path, digest, error, timings)` per
+        post, `timings` being what `BuildHandler.write_post` returns. Jobs are pulled from the
+        iterator only while fewer than `max_in_flight` posts are pending."""
+        jobs = iter(jobs)
+        in_flight = set()
+        while True:
+            while len(in_flight) < self.max_batches and (
+                batch := list(itertools.islice(jobs, self.batch_size))
+            ):
+                in_flight.add(self.executor.submit(_render_batch, batch))
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+class RenderCache:
+    """Rendered Markdown stored in `.coeur/render-cache.sqlite`, keyed by a hash of the renderer
+    version and the content: edited or re-imported content simply gets a new key, and full
+    builds drop the entries no post uses anymore (see `track` and `prune`)."""
+
+    FILENAME = "render-cache.sqlite"
+    RENDERER = f"mistune-{mistune.__version__}"
+
+    def __init__(self, cache_folder: str = CACHE_FOLDER):
+        self.path = os.path.join(cache_folder, self.FILENAME)
+        self.local = threading.local()
+        # keys of the posts of a full build, in a temporary table so memory does not grow
+        self.kept = None
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rendered (key TEXT PRIMARY KEY, html TEXT NOT NULL)"
+        )
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread, worker processes open their own
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self._connect()
+        return conn
+
+    @classmethod
+    def key(cls, content: str) -> str:
+        return hashlib.sha256(f"{cls.RENDERER}\x1f{content}".encode()).hexdigest()
+
+    def markdown(self, content: str) -> str:
+        key = self.key(content)
+        conn = self._connection()
+        if row := conn.execute("SELECT html FROM rendered WHERE key = ?", (key,)).fetchone():
+            return row[0]
+        html = mistune.html(content)
+        conn.execute("INSERT OR REPLACE INTO rendered (key, html) VALUES (?, ?)", (key, html))
+        return html
+
+    def track(self, posts_batches):
+        """Pass `posts_batches` through, noting the key of every Markdown post for `prune`."""
+        # the stage reading the batches runs on another thread than the cleanup
+        self.kept = self._connect(check_same_thread=False)
+        self.kept.execute("CREATE TEMP TABLE IF NOT EXISTS kept (key TEXT PRIMARY KEY)")
+        for posts in posts_batches:
+            self.kept.execute("BEGIN")
+            self.kept.executemany(
+                "INSERT OR IGNORE INTO temp.kept (key) VALUES (?)",
+                [
+                    (self.key(post.content),)
+                    for post in posts
+                    if post.content_format == ContentFormat.MARKDOWN.value
+                ],
+            )
+            self.kept.execute("COMMIT")
+            yield posts
+
+    def prune(self) -> int:
+        """Delete the entries of the contents no tracked post had, returning how many. Only
+        right after a build that rendered every post, edited and deleted ones leave theirs."""
+        if self.kept is None:
+            return 0
+        try:
+            return self.kept.execute(
+                "DELETE FROM rendered WHERE key NOT IN (SELECT key FROM temp.kept)"
+            ).rowcount
+        finally:
+            self.kept.close()
+            self.kept = None
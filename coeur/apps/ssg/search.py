@@ -0,0 +1,113 @@
+"""
+Full-text search of the posts: every shard answers from its own posts_fts index (see
+ShardingManager.search_statements) on its own read-only connection, the shards in parallel,
+and their ranked answers are merged. bm25 weighs words by the statistics of the shard that
+scores them, so the merged ranking is exact within a shard and approximate across shards.
+"""
+
+import heapq
+import itertools
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from coeur.apps.ssg.db import DatabaseManager, ShardingManager, get_pragmas
+
+# a word, or a "quoted phrase", optionally restricted to a column with `title:` / `content:`
+TERM = re.compile(r'(?:(title|content):)?("[^"]*"?|\S+)')
+
+
+class PostSearch:
+    # a match in the title weighs ten times a match in the content
+    WEIGHTS = (10.0, 1.0)
+
+    def __init__(self, workers: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self.pragmas = get_pragmas("build")
+
+    @staticmethod
+    def terms(query: str) -> list[tuple[str, str, bool]]:
+        """(column or "", word, prefix) of every searchable word of `query`."""
+        terms = []
+        for column, word in TERM.findall(query):
+            prefix = word.endswith("*")
+            word = word.strip('"*')
+            if any(char.isalnum() for char in word):
+                terms.append((column, word, prefix))
+        return terms
+
+    @staticmethod
+    def match_query(query: str) -> str:
+        """FTS5 query of what the user typed: every word has to match, in the title or the
+        content, `title:` or `content:` restricts a word to one of them and a trailing `*`
+        searches it as a prefix. Words are quoted, so FTS5 operators are plain text."""
+        terms = []
+        for column, word, prefix in PostSearch.terms(query):
+            term = '"{}"{}'.format(word.replace('"', '""'), "*" if prefix else "")
+            terms.append(f"{column} : {term}" if column else term)
+        return " AND ".join(terms)
+
+    @staticmethod
+    def like_query(query: str) -> tuple[str, list[str]]:
+        """WHERE clause and parameters matching the same words as `match_query` with LIKE,
+        for shards without posts_fts. Any substring matches, prefixes included."""
+        clauses, params = [], []
+        for column, word, _ in PostSearch.terms(query):
+            pattern = "%{}%".format(re.sub(r"([\\%_])", r"\\\1", word))
+            columns = [column] if column else ["title", "content"]
+            clauses.append(" OR ".join(f"{name} LIKE ? ESCAPE '\\'" for name in columns))
+            params.extend([pattern] * len(columns))
+        return " AND ".join(f"({clause})" for clause in clauses), params
+
+    def _search_shard(self, filename: str, match: str, query: str, limit: int) -> list[tuple]:
+        columns = ", ".join(f"posts.{column}" for column in DatabaseManager.COLUMNS)
+        conn = sqlite3.connect(f"file:db/{filename}?mode=ro", uri=True)
+        ShardingManager.apply_pragmas(conn, self.pragmas)
+        try:
+            try:
+                # ranked on the index alone, only the posts of the answer are read
+                return conn.execute(
+                    f"""
+                    SELECT ranked.score, {columns} FROM (
+                        SELECT rowid, bm25(posts_fts, {", ".join(map(str, self.WEIGHTS))}) AS score
+                        FROM posts_fts WHERE posts_fts MATCH ?
+                        ORDER BY score
+                        LIMIT ?
+                    ) AS ranked
+                    JOIN posts ON posts.rowid = ranked.rowid
+                    ORDER BY ranked.score
+                    """,
+                    (match, limit),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):
+                    raise
+                # a shard that never got its index is scanned, its posts ranked last
+                where, params = self.like_query(query)
+                return conn.execute(
+                    f"""
+                    SELECT 0.0, {columns} FROM posts
+                    WHERE {where}
+                    ORDER BY date DESC
+                    LIMIT ?
+                    """,
+                    (*params, limit),
+                ).fetchall()
+        finally:
+            conn.close()
+
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        """The `limit` best posts for `query` across every shard, best first. Every shard ranks
+        its own posts, their scores are merged as they are, without a global normalisation."""
+        match = self.match_query(query)
+        if not match:
+            return []
+        futures = [
+            self.executor.submit(self._search_shard, filename, match, query, limit)
+            for filename in ShardingManager.get_databases()
+        ]
+        # bm25 scores are negative, the lower the better
+        rows = heapq.merge(*(future.result() for future in futures), key=lambda row: row[0])
+        return [
+            dict(zip(DatabaseManager.COLUMNS, row[1:])) for row in itertools.islice(rows, limit)
+        ]
@@ -0,0 +1,113 @@
+"""
+Streaming sitemap writer: `<url>` entries go straight to disk as posts arrive, files are split by
+URL count and by the 50 MB protocol limit, optionally gzipped, so memory does not grow with the
+number of posts.
+"""
+
+from xml.sax.saxutils import escape
+import gzip
+import hashlib
+import os
+import tempfile
+
+from coeur.apps.ssg.manifest import BuildManifest
+from coeur.apps.ssg.output import Precompressor
+
+
+class SitemapWriter:
+    MAX_URLS = 50000
+    MAX_BYTES = 50 * 1024 * 1024
+    HEADER = (
+        '<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    ).encode()
+    FOOTER = b"</urlset>\n"
+
+    def __init__(
+        self,
+        root_folder: str,
+        manifest: BuildManifest,
+        max_urls: int = 30000,
+        compress: bool = False,
+        precompressor: Precompressor = None,
+        profiler=None,
+    ):
+        self.root_folder = root_folder
+        self.manifest = manifest
+        self.max_urls = min(max_urls, self.MAX_URLS)
+        self.compress = compress
+        self.precompressor = None if compress else precompressor
+        self.profiler = profiler
+        self.filenames = []
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type and self.file:
+            self.file.close()
+            self.raw.close()
+            os.remove(self.tmp_path)
+            self.file = None
+
+    def add(self, loc: str, lastmod: str = None) -> None:
+        entry = f"<url><loc>{escape(loc)}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{escape(lastmod)}</lastmod>"
+        entry = f"{entry}</url>\n".encode()
+
+        if self.file and (
+            self.urls >= self.max_urls
+            or self.size + len(entry) + len(self.FOOTER) > self.MAX_BYTES
+        ):
+            self._close_file()
+        if not self.file:
+            self._open_file()
+        self._write(entry)
+        self.urls += 1
+
+    def close(self) -> list[str]:
+        """Finish the current file and return the names of every sitemap file, in order."""
+        if self.file:
+            self._close_file()
+        return self.filenames
+
+    def _open_file(self) -> None:
+        os.makedirs(self.root_folder, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.root_folder, prefix=".sitemap", suffix=".tmp")
+        raw = os.fdopen(fd, "wb")
+        self.file = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if self.compress else raw
+        self.raw = raw
+        self.hasher = hashlib.blake2b(digest_size=16)
+        self.urls = 0
+        self.size = 0
+        self._write(self.HEADER)
+
+    def _write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.hasher.update(data)
+        self.size += len(data)
+
+    def _close_file(self) -> None:
+        self._write(self.FOOTER)
+        self.file.close()
+        if self.raw is not self.file:
+            self.raw.close()
+        self.file = None
+
+        filename = f"sitemap{len(self.filenames) + 1}.xml{'.gz' if self.compress else ''}"
+        self.filenames.append(filename)
+        digest = self.manifest.digest(self.hasher.hexdigest())
+        if self.manifest.is_fresh("sitemaps", f"/{filename}", digest):
+            os.remove(self.tmp_path)
+            return
+        os.chmod(self.tmp_path, 0o644)
+        file_path = os.path.join(self.root_folder, filename)
+        os.replace(self.tmp_path, file_path)
+        if self.profiler:
+            self.profiler.add_write(os.path.getsize(file_path))
+        if self.precompressor:
+            with open(file_path, "rb") as file:
+                self.precompressor.compress(file_path, file.read())
+        self.manifest.record("sitemaps", f"/{filename}", digest)
@@ -1,44 +1,58 @@
-from coeur.apps.ssg.build import BuildHandler
-from coeur.apps.ssg.markdown import MarkdownHandler
-from coeur.apps.ssg.bootstrap import CreateHandler, ExportTemplates
-from coeur.apps.ssg.admin import AdminHandler
-
 import typer
 
+# subsystems are imported by the commands using them, so the CLI starts fast
+
 app = typer.Typer()
 
 
 @app.command()
-def build() -> None:
-    """Build the site in current directory"""
-    BuildHandler().handler()
+def build(full: bool = False, profile: bool = False) -> None:
+    """Build the site in current directory, only rewriting what changed (use --full to rebuild all)"""
+    from coeur.apps.ssg.build import BuildHandler
+
+    BuildHandler(full=full, profile=profile).handler()
 
 
 @app.command()
 def markdown_to_db(posts_directory: str):
     """Create the coeur database from markdown files of Zola framework"""
+    from coeur.apps.ssg.markdown import MarkdownHandler
+
     MarkdownHandler.handler(posts_directory)
 
 
 @app.command()
-def serve(port: int = 8080, max_posts: int = None):
-    """Server to test and see the project working locally"""
-    BuildHandler(max_posts=max_posts).serve(port)
+def serve(port: int = 8080, max_posts: int = None, lazy: bool = False):
+    """Server to test and see the project working locally (use --lazy to render on request)"""
+    from coeur.apps.ssg.build import BuildHandler
+
+    if lazy:
+        from coeur.apps.ssg.ondemand import OnDemandServer
+
+        OnDemandServer(BuildHandler()).serve(port)
+    else:
+        BuildHandler(max_posts=max_posts).serve(port)
 
 
 @app.command()
 def create(name: str):
     """Create a new coeur ssg project"""
+    from coeur.apps.ssg.bootstrap import CreateHandler
+
     CreateHandler(name)
 
 
 @app.command()
 def export_templates():
     """Export the default template for customization"""
+    from coeur.apps.ssg.bootstrap import ExportTemplates
+
     ExportTemplates.export()
 
 
 @app.command()
 def admin(port: int = 8000, host: str = "127.0.0.1"):
     """Manage your posts using the web dashboard"""
+    from coeur.apps.ssg.admin import AdminHandler
+
     AdminHandler(host=host, port=port).handler()
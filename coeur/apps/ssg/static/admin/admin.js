@@ -178,7 +178,7 @@
     }
     showMessage("Searching…");
     try {
-      const items = await fetchJson(API + "/posts/search?title=" + encodeURIComponent(title));
+      const items = await fetchJson(API + "/posts/search?q=" + encodeURIComponent(title));
       el.resultsList.innerHTML = "";
       if (items.length === 0) {
         el.resultsList.innerHTML = "<p>No results.</p>";
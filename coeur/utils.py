@@ -3,27 +3,42 @@ import os
 import time
 from datetime import timedelta, datetime
 from concurrent.futures import ThreadPoolExecutor
+import email.utils
+import http
 import http.server
-import socketserver
+import json
+import threading
 
 import toml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 process = psutil.Process(os.getpid())
 
+CACHE_FOLDER = "./.coeur"
+
+# template environments shared by every BuildSettings of the process, by folder and config
+_environments = {}
+_environments_lock = threading.Lock()
+
 
 class BuildSettings:
     def __init__(self, config_path) -> None:
         self.database = "db/db1.sqlite"
-        self.posts_db_pagination = 10000
+        self.posts_db_pagination = 1000
         self.posts_pagination = 100
         self.root_folder = self.get_output_folder()
+        self.cache_folder = self.get_cache_folder()
+        self.config_path = config_path
         self.template_folder = self.get_template_folder()
         self.coeur_thread_ex = self.get_async_executor()
         if os.path.exists(config_path):
             self.config = toml.load(config_path)
             self.templates = self.get_templates()
 
+    def reload(self):
+        self.config = toml.load(self.config_path)
+        self.reload_templates()
+
     def reload_templates(self):
         self.templates = self.get_templates()
 
@@ -34,18 +49,54 @@ class BuildSettings:
             else self.config["base_url"]
         )
 
+    def get_build_option(self, name, default=None):
+        return self.config.get("build", {}).get(name, default)
+
+    def get_database_pragmas(self, profile):
+        return self.config.get("database", {}).get(profile, {})
+
+    def get_render_backend(self):
+        return self.get_build_option("render_backend", "process")
+
+    def get_render_workers(self):
+        return self.get_build_option("workers") or os.cpu_count() or 1
+
+    def get_render_window(self):
+        return max(self.get_build_option("max_in_flight", 256), 1)
+
     def get_seo_variations_path(self):
         return self.config.get("seo_variations", {}).get("paths", [])
 
-    def get_templates(self):
-        template_eng = Environment(loader=FileSystemLoader(searchpath=self.template_folder))
-        template_eng.globals.update({**self.config})
+    def get_seo_variations_link(self):
+        return self.config.get("seo_variations", {}).get("link", "copy")
+
+    def get_template_environment(self) -> Environment:
+        bytecode_folder = os.path.abspath(os.path.join(self.cache_folder, "jinja"))
+        key = (
+            os.path.abspath(self.template_folder),
+            bytecode_folder,
+            json.dumps(self.config, sort_keys=True, default=str),
+        )
+        with _environments_lock:
+            if (template_eng := _environments.get(key)) is None:
+                # compiled templates are kept on disk, checked against the template source, so
+                # worker processes and later runs skip the compilation
+                os.makedirs(bytecode_folder, exist_ok=True)
+                template_eng = Environment(
+                    loader=FileSystemLoader(searchpath=self.template_folder),
+                    bytecode_cache=FileSystemBytecodeCache(bytecode_folder),
+                )
+                template_eng.globals.update({**self.config})
+                template_eng.globals.update({"year": datetime.now().year})
+                _environments[key] = template_eng
+        return template_eng
 
-        template_eng.globals.update({"year": datetime.now().year})
+    def get_templates(self):
+        # templates edited on disk are recompiled by get_template (auto_reload)
+        template_eng = self.get_template_environment()
         return {
             "post": template_eng.get_template("post.html"),
             "page": template_eng.get_template("page.html"),
-            "sitemap": template_eng.get_template("sitemap.xml"),
         }
 
     def get_async_executor(self):
@@ -54,6 +105,9 @@ class BuildSettings:
     def get_output_folder(self):
         return "./public"
 
+    def get_cache_folder(self):
+        return CACHE_FOLDER
+
     def get_template_folder(self):
         default = os.path.join(os.path.dirname(__file__), "apps", "ssg", "templates")
         if os.path.exists("./templates/"):
@@ -96,6 +150,12 @@ class Benchmark:
 
 class HttpHandler:
     class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+        """Static files with ETag/Last-Modified revalidation (304), precompressed siblings
+        (`.br`, `.zst`, `.gz`) for clients accepting them, and bodies sent with sendfile."""
+
+        protocol_version = "HTTP/1.1"
+        ENCODINGS = (("br", ".br"), ("zstd", ".zst"), ("gzip", ".gz"))
+
         def __init__(self, *args, root_folder=None, **kwargs):
             self.root_folder = root_folder
             super().__init__(*args, **kwargs)
@@ -105,17 +165,91 @@ class HttpHandler:
             relpath = os.path.relpath(path, os.getcwd())
             return os.path.join(self.root_folder, relpath)
 
-    def __init__(self, root_folder, port=8081):
+        def send_head(self):
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                index = os.path.join(path, "index.html")
+                if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                    # redirects and directory listings
+                    return super().send_head()
+                path = index
+            if not os.path.isfile(path):
+                return super().send_head()
+
+            file_path, encoding = self.negotiate(path)
+            try:
+                file = open(file_path, "rb")
+            except OSError:
+                self.send_error(http.HTTPStatus.NOT_FOUND, "File not found")
+                return None
+            try:
+                stat = os.fstat(file.fileno())
+                etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+                if self.not_modified(etag, stat.st_mtime):
+                    file.close()
+                    self.send_response(http.HTTPStatus.NOT_MODIFIED)
+                    self.send_validators(etag, stat.st_mtime)
+                    self.end_headers()
+                    return None
+
+                self.send_response(http.HTTPStatus.OK)
+                self.send_header("Content-Type", self.guess_type(path))
+                self.send_header("Content-Length", str(stat.st_size))
+                if encoding:
+                    self.send_header("Content-Encoding", encoding)
+                self.send_validators(etag, stat.st_mtime)
+                self.end_headers()
+                return file
+            except Exception:
+                file.close()
+                raise
+
+        def negotiate(self, path: str) -> tuple[str, str | None]:
+            accepted = {
+                value.split(";", 1)[0].strip()
+                for value in self.headers.get("Accept-Encoding", "").split(",")
+            }
+            for encoding, extension in self.ENCODINGS:
+                if encoding in accepted and os.path.isfile(f"{path}{extension}"):
+                    return f"{path}{extension}", encoding
+            return path, None
+
+        def not_modified(self, etag: str, mtime: float) -> bool:
+            if if_none_match := self.headers.get("If-None-Match"):
+                return if_none_match.strip() == "*" or etag in (
+                    value.strip().removeprefix("W/") for value in if_none_match.split(",")
+                )
+            if if_modified_since := self.headers.get("If-Modified-Since"):
+                try:
+                    since = email.utils.parsedate_to_datetime(if_modified_since)
+                except (TypeError, ValueError):
+                    return False
+                return since.tzinfo is not None and int(mtime) <= since.timestamp()
+            return False
+
+        def send_validators(self, etag: str, mtime: float) -> None:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+            self.send_header("Vary", "Accept-Encoding")
+            # always revalidate, a rebuilt file is picked up on the next request
+            self.send_header("Cache-Control", "no-cache")
+
+        def copyfile(self, source, outputfile):
+            # os.sendfile when possible, socket.sendfile falls back to send() by itself
+            self.connection.sendfile(source)
+
+    def __init__(self, root_folder, port=8081, request_handler=None):
         self.root_folder = root_folder
         self.port = port
+        self.request_handler = request_handler or self.CustomHTTPRequestHandler
         self.httpd = None
 
     def serve_forever(self):
-        Handler = lambda *args, **kwargs: self.CustomHTTPRequestHandler(
+        Handler = lambda *args, **kwargs: self.request_handler(
             *args, root_folder=self.root_folder, **kwargs
         )
-        socketserver.TCPServer.allow_reuse_address = True
-        self.httpd = socketserver.TCPServer(("", self.port), Handler)
+        # one thread per connection, a slow client or a big asset does not block the others
+        self.httpd = http.server.ThreadingHTTPServer(("", self.port), Handler)
         print(f"Serving at port http://localhost:{self.port}")
         self.httpd.serve_forever()
 
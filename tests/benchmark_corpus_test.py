@@ -0,0 +1,19 @@
+import sqlite3
+
+from benchmarks.corpus import CorpusGenerator
+
+
+def test_corpus_is_reproducible_and_sharded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    corpus = CorpusGenerator(posts=30, shards=3, seed=7, median_size=500)
+    assert list(corpus.generate_posts()) == list(corpus.generate_posts())
+    assert {post["content_format"] for post in corpus.generate_posts()} == {"md", "html"}
+
+    project = corpus.create("bench")
+    for shard in (1, 2, 3):
+        conn = sqlite3.connect(f"{project}/db/db{shard}.sqlite")
+        # db1 also holds the welcome post of a new project
+        expected = 11 if shard == 1 else 10
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == expected
+        conn.close()
+    assert 'paths = ["amp", "print"]' in (tmp_path / "bench" / "config.toml").read_text()
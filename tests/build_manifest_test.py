@@ -0,0 +1,89 @@
+import os
+import sqlite3
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.manifest import BuildManifest
+from conftest import insert_posts
+
+
+def test_manifest_tracks_fresh_and_stale_outputs(tmp_path):
+    manifest = BuildManifest(str(tmp_path), "inputs")
+    manifest.record("posts", "/a/", manifest.digest("a", 1))
+    manifest.record("posts", "/b/", manifest.digest("b", 1))
+    manifest.save()
+
+    manifest = BuildManifest(str(tmp_path), "inputs")
+    assert manifest.incremental
+    assert manifest.is_fresh("posts", "/a/", manifest.digest("a", 1))
+    assert not manifest.is_fresh("posts", "/b/", manifest.digest("b", 2))
+    assert manifest.stale("posts") == ["/b/"]
+
+
+def test_manifest_digest_depends_on_inputs(tmp_path):
+    first = BuildManifest(str(tmp_path), "templates-v1")
+    second = BuildManifest(str(tmp_path), "templates-v2")
+    assert first.digest("post") != second.digest("post")
+    assert first.digest(None) == first.digest("")
+
+
+def test_full_build_ignores_previous_manifest(tmp_path):
+    manifest = BuildManifest(str(tmp_path), "inputs")
+    manifest.record("pages", "/index.html", "digest")
+    manifest.save()
+
+    assert not BuildManifest(str(tmp_path), "inputs", incremental=False).incremental
+
+
+def test_incremental_build_rewrites_only_what_changed(blog, monkeypatch):
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("DELETE FROM posts")
+    conn.commit()
+    conn.close()
+    insert_posts(
+        1,
+        [
+            {"uuid": name, "title": name, "path": f"/{name}/", "date": f"2024-01-0{i + 1}"}
+            for i, name in enumerate(("a", "b", "c"))
+        ],
+    )
+    written = []
+    write_post = BuildHandler.write_post
+
+    def spy(self, post):
+        written.append(post.path)
+        return write_post(self, post)
+
+    monkeypatch.setattr(BuildHandler, "write_post", spy)
+
+    def build(**kwargs):
+        written.clear()
+        handler = BuildHandler(**kwargs)
+        handler.settings.config.setdefault("build", {})["render_backend"] = "thread"
+        handler.handler()
+        return sorted(written)
+
+    index = blog / "public" / "index.html"
+    assert build() == ["/a/", "/b/", "/c/"]
+    os.utime(index, (0, 0))
+
+    assert build() == []
+    assert os.stat(index).st_mtime == 0
+
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("UPDATE posts SET content = 'edited' WHERE uuid = 'b'")
+    conn.commit()
+    conn.close()
+    assert build() == ["/b/"]
+    # the listing shows no content, so it is left as it is
+    assert os.stat(index).st_mtime == 0
+    assert "edited" in (blog / "public" / "b" / "index.html").read_text()
+
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("DELETE FROM posts WHERE uuid = 'c'")
+    conn.commit()
+    conn.close()
+    assert build() == []
+    assert not (blog / "public" / "c").exists()
+    assert os.stat(index).st_mtime != 0
+
+    assert build(full=True) == ["/a/", "/b/"]
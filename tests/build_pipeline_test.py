@@ -0,0 +1,57 @@
+import os
+import re
+
+import pytest
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.db import DatabaseManager
+from conftest import insert_posts
+
+
+def test_pipeline_reads_listing_columns_for_pages_and_sitemap(blog, monkeypatch):
+    insert_posts(2, [{"uuid": "x", "title": "Piped", "path": "/piped/", "date": "2024-01-01"}])
+    reads = []
+    generator_page_posts = DatabaseManager.generator_page_posts
+
+    def spy(self, *args, **kwargs):
+        reads.append(kwargs.get("columns"))
+        return generator_page_posts(self, *args, **kwargs)
+
+    monkeypatch.setattr(DatabaseManager, "generator_page_posts", spy)
+    build = BuildHandler(full=True)
+    build.handler()
+
+    # the post contents only come from the shard readers of the single posts stage
+    assert reads == [DatabaseManager.LISTING_COLUMNS]
+    root = build.settings.root_folder
+    assert os.path.exists(os.path.join(root, "piped", "index.html"))
+    with open(os.path.join(root, "index.html")) as file:
+        assert "Piped" in file.read()
+    assert os.path.exists(os.path.join(root, "sitemap.xml"))
+
+
+@pytest.mark.parametrize("pipeline", [True, False])
+def test_max_posts_renders_the_posts_the_listing_links(blog, pipeline):
+    for db in (1, 2, 3):
+        insert_posts(
+            db,
+            [
+                {
+                    "uuid": f"{db}-{i}",
+                    "title": f"P{db}{i}",
+                    "path": f"/p{db}{i}/",
+                    "date": f"2024-01-{i + 1:02}",
+                }
+                for i in range(20)
+            ],
+        )
+    build = BuildHandler(max_posts=10, full=True)
+    build.settings.config.setdefault("build", {})["pipeline"] = pipeline
+    build.handler()
+
+    root = build.settings.root_folder
+    with open(os.path.join(root, "index.html")) as file:
+        links = set(re.findall(r'href="(/p\d+/)"', file.read()))
+    assert links
+    for link in links:
+        assert os.path.exists(os.path.join(root, link.strip("/"), "index.html")), link
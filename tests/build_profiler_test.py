@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+
+from coeur.apps.ssg.manifest import BuildManifest
+from coeur.apps.ssg.profiling import BuildProfiler
+from coeur.apps.ssg.sitemap import SitemapWriter
+
+
+def timings(seconds):
+    return {"markdown": seconds, "jinja": 0.0, "minify": 0.0, "write": 0.0, "files": 1, "bytes": 10}
+
+
+def test_profiler_reports_slowest_posts_and_writes(tmp_path):
+    profiler = BuildProfiler(slowest=2, interval=0.01)
+    profiler.start()
+    with profiler.stage("posts"):
+        for index, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+            profiler.add_post(f"/post/{index}/", timings(seconds))
+    profiler.add_shard_read("db1.sqlite", 0.25, 100)
+    profiler.add_write(0)
+    profiler.add_write(5)
+    profiler.stop()
+
+    report = profiler.report()
+    assert [post["path"] for post in report["posts"]["slowest"]] == ["/post/2/", "/post/0/"]
+    assert report["posts"]["rendered"] == 4
+    assert report["writes"]["files"] == 5 and report["writes"]["bytes"] == 45
+    assert report["shards"]["db1.sqlite"] == {"seconds": 0.25, "rows": 100, "queries": 1}
+    assert "posts" in report["stages"] and report["memory"]["timeline"]
+    assert (tmp_path / BuildProfiler.FILENAME).samefile(profiler.save(str(tmp_path)))
+
+
+def test_stage_cpu_counts_render_threads_and_workers(tmp_path):
+    def spin():
+        deadline = time.process_time() + 0.2
+        while time.process_time() < deadline:
+            ...
+
+    profiler = BuildProfiler(interval=0.01)
+    profiler.start()
+    with profiler.stage("posts"):
+        # a render thread burning CPU, and a post a worker process rendered in 2 seconds
+        thread = threading.Thread(target=spin)
+        thread.start()
+        thread.join()
+        profiler.add_post("/post/", timings(2.0), worker=True)
+    manifest = BuildManifest(str(tmp_path), "inputs")
+    with profiler.stage("sitemaps"):
+        with SitemapWriter(str(tmp_path), manifest, profiler=profiler) as writer:
+            writer.add("https://example.com/post/")
+            writer.close()
+    profiler.stop()
+
+    report = profiler.report()
+    assert report["stages"]["posts"]["cpu"] >= 2.2
+    assert report["stages"]["sitemaps"]["cpu"] < 2
+    assert report["writes"]["files"] == 2
+    assert report["writes"]["bytes"] == 10 + os.path.getsize(tmp_path / "sitemap1.xml")
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+# the CLI runs from cron thousands of times a day, `blog-coeur --help` must stay cheap
+IMPORT_BUDGET_US = 400_000
+HEAVY_MODULES = (
+    "openai",
+    "sqlalchemy",
+    "fastapi",
+    "mistune",
+    "minify_html",
+    "watchdog",
+    "bs4",
+    "requests",
+    "jinja2",
+    "dotenv",
+)
+
+
+def test_cli_import_is_lazy_and_within_budget(tmp_path):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, coeur.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=tmp_path,
+        env={"PYTHONPATH": ":".join(sys.path)},
+    )
+    assert result.stdout.strip() == "[]"
+
+    cumulative = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.split("|")[-1].strip() == "coeur.main"
+    )
+    assert cumulative < IMPORT_BUDGET_US
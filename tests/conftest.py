@@ -0,0 +1,28 @@
+import sqlite3
+
+import pytest
+
+from coeur.apps.ssg.bootstrap import CreateHandler
+from coeur.apps.ssg.db import ShardingManager
+
+
+@pytest.fixture
+def blog(tmp_path, monkeypatch):
+    """A fresh coeur project (db/db1.sqlite with the welcome post) as current directory."""
+    monkeypatch.chdir(tmp_path)
+    CreateHandler("blog")
+    monkeypatch.chdir(tmp_path / "blog")
+    return tmp_path / "blog"
+
+
+def insert_posts(db: int, posts: list[dict]):
+    if f"db{db}.sqlite" not in ShardingManager.get_databases():
+        ShardingManager.create_new_database()
+    conn = sqlite3.connect(f"db/db{db}.sqlite")
+    for post in posts:
+        row = {"content": "content", "content_format": "html", "extra": None, "image": None}
+        row.update(post, db=db)
+        columns, placeholders = ", ".join(row), ", ".join("?" * len(row))
+        conn.execute(f"INSERT INTO posts ({columns}) VALUES ({placeholders})", list(row.values()))
+    conn.commit()
+    conn.close()
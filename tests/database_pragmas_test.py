@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from coeur.apps.ssg.db import DatabaseManager, get_settings
+from conftest import insert_posts
+
+
+def pragma(db: DatabaseManager, name: str):
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_managers_share_a_pool_with_the_profile_on_every_shard(blog):
+    get_settings.cache_clear()
+    insert_posts(2, [{"uuid": "a", "title": "A", "path": "/a/", "date": "2024-01-01"}])
+    first, second = DatabaseManager(), DatabaseManager()
+    assert first.session.get_bind() is second.session.get_bind()
+    assert pragma(first, "db2.journal_mode") == "wal"
+    assert pragma(first, "db2.mmap_size") == 268435456
+    first.session.close()
+
+    # shards created while the pool is open are attached on the next checkout
+    insert_posts(3, [{"uuid": "b", "title": "B", "path": "/b/", "date": "2024-01-02"}])
+    assert pragma(second, "db3.journal_mode") == "wal"
+    assert second.count_total_posts() == 3
+    second.session.close()
+
+    importer = DatabaseManager(profile="import")
+    assert importer.session.get_bind() is not first.session.get_bind()
+    assert pragma(importer, "db3.cache_size") == -131072
+    assert pragma(importer, "mmap_size") == 0
+    importer.session.close()
+
+
+def test_config_overrides_the_preset(blog):
+    config = (blog / "config.toml").read_text()
+    (blog / "config.toml").write_text(config.replace("mmap_size = 268435456", "mmap_size = 0"))
+    get_settings.cache_clear()
+    try:
+        db = DatabaseManager()
+        assert pragma(db, "mmap_size") == 0
+        db.session.close()
+    finally:
+        get_settings.cache_clear()
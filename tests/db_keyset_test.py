@@ -0,0 +1,70 @@
+import pytest
+
+from coeur.apps.ssg.db import DatabaseManager, OrderBy, Post
+from conftest import insert_posts
+
+
+@pytest.fixture
+def sharded_blog(blog):
+    for db in (1, 2, 3):
+        insert_posts(
+            db,
+            [
+                {
+                    "uuid": f"{db}-{i:02d}",
+                    "title": f"Post {db}/{i}",
+                    "path": f"/db{db}/{i}/",
+                    "date": f"2024-01-{i % 5 + 1:02d}" if i % 4 else None,
+                }
+                for i in range(20)
+            ],
+        )
+    return blog
+
+
+def sort_key(post):
+    return (post.date is not None, post.date or "", post.uuid)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 50])
+def test_iter_posts_is_ordered_across_shards(sharded_blog, batch_size):
+    db = DatabaseManager()
+    posts = list(db.iter_posts(order_by=OrderBy.DESC, batch_size=batch_size))
+    assert len(posts) == 61
+    assert posts == sorted(posts, key=sort_key, reverse=True)
+
+    ascending = list(db.iter_posts(order_by=OrderBy.ASC, batch_size=batch_size))
+    assert [post.uuid for post in ascending] == [post.uuid for post in reversed(posts)]
+
+
+def test_generator_page_posts_pages_and_limits(sharded_blog):
+    db = DatabaseManager()
+    pages = list(db.generator_page_posts(total_by_page=25))
+    assert [len(page) for page in pages] == [25, 25, 11]
+    assert len({post.uuid for page in pages for post in page}) == 61
+
+    pages = list(db.generator_page_posts(total_by_page=25, max_posts_server=30))
+    assert [len(page) for page in pages] == [25, 5]
+
+
+def test_generator_page_posts_column_projection(sharded_blog):
+    db = DatabaseManager()
+    posts = next(db.generator_page_posts(total_by_page=10, columns=["title", "path"]))
+    assert posts[0].title and posts[0].path and posts[0].db
+    assert all(post.content is None for post in posts)
+    # posts of the other shards leave the mapped table of db1 as it is
+    assert {post.db for post in posts} == {1, 2, 3} and Post.__table__.schema is None
+
+
+def test_get_posts_pages_through_the_merged_shards(sharded_blog):
+    db = DatabaseManager()
+    everything = list(db.iter_posts())
+    pages = [db.get_posts(page=page, limit=7) for page in range(1, 11)]
+    assert [post.uuid for page in pages for post in page] == [post.uuid for post in everything]
+
+    posts = db.get_posts(
+        limit=50, filters=[{"date": "2024-01-02"}], exclude_filters=[{"path": "/db2/1/"}]
+    )
+    assert [post.uuid for post in posts] == [
+        "3-11", "3-06", "3-01", "2-11", "2-06", "1-11", "1-06", "1-01"
+    ]
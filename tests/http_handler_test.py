@@ -0,0 +1,46 @@
+import gzip
+import http.client
+import threading
+import time
+
+import pytest
+
+from coeur.utils import HttpHandler
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "post").mkdir()
+    (tmp_path / "post" / "index.html").write_text("<p>post</p>")
+    (tmp_path / "post" / "index.html.gz").write_bytes(gzip.compress(b"<p>post</p>"))
+    handler = HttpHandler(str(tmp_path), port=0)
+    thread = threading.Thread(target=handler.serve_forever, daemon=True)
+    thread.start()
+    while handler.httpd is None:
+        time.sleep(0.01)
+    yield handler.httpd.server_address[1]
+    handler.shutdown()
+
+
+def get(port, path, headers=None):
+    conn = http.client.HTTPConnection("localhost", port)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_conditional_get_answers_not_modified(server):
+    response, body = get(server, "/post/")
+    assert response.status == 200 and body == b"<p>post</p>"
+
+    response, body = get(server, "/post/", {"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304 and body == b""
+
+
+def test_gzip_sibling_is_served_to_accepting_clients(server):
+    response, body = get(server, "/post/index.html", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Content-Type") == "text/html"
+    assert gzip.decompress(body) == b"<p>post</p>"
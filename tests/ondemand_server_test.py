@@ -0,0 +1,60 @@
+import os
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.ondemand import LRUCache, OnDemandServer
+from conftest import insert_posts
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ondemand_server_renders_posts_by_path(blog):
+    insert_posts(2, [{"uuid": "x", "title": "Lazy post", "path": "/lazy/", "date": "2024-01-01"}])
+    server = OnDemandServer(BuildHandler())
+
+    html = server.response("/lazy/index.html")
+    assert b"Lazy post" in html
+    assert server.response("/lazy") == html
+    assert server.response("/missing/") is None
+    assert b"Lazy post" in server.response("/")
+    assert server.response("/page/99/") is None
+
+
+def test_ondemand_server_picks_up_template_edits(blog):
+    os.makedirs("templates")
+    for name in ("post.html", "page.html"):
+        with open(f"templates/{name}", "w") as file:
+            file.write("{{ post.title }}")
+    server = OnDemandServer(BuildHandler())
+    insert_posts(1, [{"uuid": "x", "title": "Lazy post", "path": "/lazy/", "date": "2024-01-01"}])
+    assert server.response("/lazy/") == b"Lazy post"
+
+    with open("templates/post.html", "w") as file:
+        file.write("<h1>{{ post.title }}</h1>")
+    assert server.response("/lazy/") == b"<h1>Lazy post</h1>"
+
+
+def test_ondemand_server_returns_connections_to_the_pool(blog):
+    import threading
+
+    from coeur.apps.ssg.db import get_engine
+
+    insert_posts(1, [{"uuid": "x", "title": "Lazy post", "path": "/lazy/", "date": "2024-01-01"}])
+    server = OnDemandServer(BuildHandler())
+    # one thread per request, as ThreadingHTTPServer does
+    threads = [
+        threading.Thread(target=server.render, args=(path,))
+        for path in ("/lazy/", "/", "/missing/") * 10
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert get_engine().pool.checkedout() == 0
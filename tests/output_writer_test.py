@@ -0,0 +1,40 @@
+import gzip
+import os
+
+import pytest
+
+from coeur.apps.ssg.output import OutputWriter, Precompressor
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_write_skips_identical_content(tmp_path, atomic):
+    writer = OutputWriter(str(tmp_path), atomic=atomic)
+    assert writer.write("/posts/a//index.html", b"<html>a</html>")
+    file_path = tmp_path / "posts" / "a" / "index.html"
+    os.utime(file_path, (0, 0))
+
+    assert not writer.write("/posts/a/index.html", b"<html>a</html>")
+    assert os.stat(file_path).st_mtime == 0
+
+    assert writer.write("/posts/a/index.html", b"<html>b</html>")
+    assert file_path.read_bytes() == b"<html>b</html>"
+    assert os.listdir(file_path.parent) == ["index.html"]
+    assert writer.folders == {str(file_path.parent)}
+
+
+def test_atomic_precompressor_renames_its_siblings_in_place(tmp_path, monkeypatch):
+    replaced = []
+    replace = os.replace
+
+    def spy(source, target):
+        replaced.append(os.path.basename(target))
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", spy)
+    precompressor = Precompressor(atomic=True)
+    precompressor.compress(str(tmp_path / "index.html"), b"<html>a</html>")
+
+    siblings = [f"index.html{sibling}" for sibling in precompressor.siblings]
+    assert replaced == siblings
+    assert sorted(os.listdir(tmp_path)) == sorted(siblings)
+    assert gzip.decompress((tmp_path / "index.html.gz").read_bytes()) == b"<html>a</html>"
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+from coeur.apps.ssg.db import DatabaseManager, ShardingManager
+from conftest import insert_posts
+
+
+def posts(prefix: str, count: int) -> list[dict]:
+    return [
+        {"uuid": f"{prefix}-{i}", "title": f"Post {i}", "path": f"/{prefix}/{i}/", "date": None}
+        for i in range(count)
+    ]
+
+
+def test_counters_follow_inserts_and_deletes(blog):
+    insert_posts(1, posts("a", 4))
+    db = DatabaseManager()
+    # db1 also holds the welcome post of a new project, counted when the counter is created
+    assert db.count_posts_by_shard() == {"db1.sqlite": 5}
+    db.session.close()
+
+    insert_posts(2, posts("b", 3))
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("DELETE FROM posts WHERE uuid IN ('a-0', 'a-1')")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager()
+    assert db.count_posts_by_shard() == {"db1.sqlite": 3, "db2.sqlite": 3}
+    assert db.count_total_posts() == 6
+    db.session.close()
+
+
+def test_counters_and_indexes_survive_a_shard_without_search(blog, monkeypatch):
+    # what an SQLite built without FTS5 answers
+    monkeypatch.setattr(
+        ShardingManager,
+        "search_statements",
+        staticmethod(lambda schema: ["CREATE VIRTUAL TABLE posts_fts USING fts5_missing(title)"]),
+    )
+
+    db = DatabaseManager()
+    with pytest.warns(UserWarning, match="db1.sqlite skipped"):
+        assert db.count_posts_by_shard() == {"db1.sqlite": 1}
+    db.session.close()
+    conn = sqlite3.connect("db/db1.sqlite")
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    assert {"posts_count", "idx_posts_listing"} <= tables and "posts_fts" not in tables
+
+
+def test_counter_is_seeded_once_whatever_the_connections(blog):
+    insert_posts(2, posts("a", 2))
+    # every pooled connection runs the schema statements when it opens
+    managers = [DatabaseManager() for _ in range(8)]
+    for db in managers:
+        assert db.count_total_posts() == 3
+    for db in managers:
+        db.session.close()
+
+    for filename in ("db1.sqlite", "db2.sqlite"):
+        conn = sqlite3.connect(f"db/{filename}")
+        assert conn.execute("SELECT COUNT(*) FROM posts_count").fetchone()[0] == 1
+        conn.close()
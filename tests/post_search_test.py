@@ -0,0 +1,54 @@
+import sqlite3
+
+from coeur.apps.ssg.db import DatabaseManager
+from coeur.apps.ssg.search import PostSearch
+from conftest import insert_posts
+
+
+def test_match_query_quotes_words_and_keeps_prefixes():
+    assert PostSearch.match_query('café title:sacre* "rue des" OR') == (
+        '"café" AND title : "sacre"* AND "rue des" AND "OR"'
+    )
+    assert PostSearch.match_query('- "" *') == ""
+
+
+def test_search_ranks_across_shards_and_follows_writes(blog):
+    insert_posts(1, [{"uuid": "a", "title": "Paris guide", "path": "/a/", "content": "metro"}])
+    insert_posts(
+        2,
+        [
+            {"uuid": "b", "title": "Lyon", "path": "/b/", "content": "a day trip from Paris"},
+            {"uuid": "c", "title": "Nice", "path": "/c/", "content": "beaches"},
+        ],
+    )
+    # the connect hook builds the index of the posts already there
+    db = DatabaseManager()
+    assert db.count_total_posts() == 4
+    db.session.close()
+    search = PostSearch()
+
+    assert [post["uuid"] for post in search.search("paris")] == ["a", "b"]
+    assert [post["uuid"] for post in search.search("title:paris")] == ["a"]
+    assert [post["uuid"] for post in search.search("bea*")] == ["c"]
+    assert search.search("trip paris")[0]["title"] == "Lyon"
+
+    conn = sqlite3.connect("db/db2.sqlite")
+    conn.execute("UPDATE posts SET content = 'sunny beaches of Paris' WHERE uuid = 'c'")
+    conn.execute("DELETE FROM posts WHERE uuid = 'b'")
+    conn.commit()
+    conn.close()
+    assert [post["uuid"] for post in search.search("paris")] == ["a", "c"]
+    assert search.search("trip") == []
+
+
+def test_shards_without_index_match_the_parsed_words(blog):
+    assert PostSearch.like_query('title:50%_off* "rue des"') == (
+        "(title LIKE ? ESCAPE '\\') AND (title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')",
+        ["%50\\%\\_off%", "%rue des%", "%rue des%"],
+    )
+
+    # no DatabaseManager connected yet, so db1 has no posts_fts
+    insert_posts(1, [{"uuid": "a", "title": "Paris guide", "path": "/a/", "content": "metro"}])
+    search = PostSearch()
+    assert [post["uuid"] for post in search.search("title:pari* metro")] == ["a"]
+    assert search.search("paris bus") == []
@@ -0,0 +1,67 @@
+import sqlite3
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.render import RenderCache
+from conftest import insert_posts
+
+
+def build(**kwargs) -> BuildHandler:
+    handler = BuildHandler(**kwargs)
+    handler.settings.config.setdefault("build", {})["render_backend"] = "thread"
+    handler.handler()
+    return handler
+
+
+def cached_keys(handler: BuildHandler) -> set:
+    conn = sqlite3.connect(handler.render_cache.path)
+    keys = {row[0] for row in conn.execute("SELECT key FROM rendered")}
+    conn.close()
+    return keys
+
+
+def update(uuid: str, content: str):
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("UPDATE posts SET content = ? WHERE uuid = ?", (content, uuid))
+    conn.commit()
+    conn.close()
+
+
+def test_full_builds_drop_the_entries_of_replaced_contents(blog):
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("DELETE FROM posts")
+    conn.commit()
+    conn.close()
+    insert_posts(
+        1,
+        [
+            {
+                "uuid": uuid,
+                "title": uuid,
+                "path": f"/{uuid}/",
+                "content": f"# {uuid}",
+                "content_format": "md",
+            }
+            for uuid in ("a", "b")
+        ],
+    )
+    handler = build()
+    assert cached_keys(handler) == {RenderCache.key("# a"), RenderCache.key("# b")}
+
+    update("a", "# a, edited")
+    handler = build()
+    # incremental builds only render what changed, they can not tell what is unused
+    assert cached_keys(handler) == {
+        RenderCache.key(content) for content in ("# a", "# b", "# a, edited")
+    }
+
+    update("b", "# b, edited")
+    kept = cached_keys(handler)
+    # a limited build does not render every post either
+    handler = build(full=True, max_posts=1)
+    assert kept <= cached_keys(handler)
+
+    handler = build(full=True)
+    assert cached_keys(handler) == {
+        RenderCache.key("# a, edited"),
+        RenderCache.key("# b, edited"),
+    }
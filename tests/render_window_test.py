@@ -0,0 +1,35 @@
+import threading
+import time
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.render import ProcessRenderEngine
+
+
+def test_thread_render_keeps_a_bounded_window(blog, monkeypatch):
+    handler = BuildHandler()
+    monkeypatch.setattr(handler.settings, "get_render_backend", lambda: "thread")
+    monkeypatch.setattr(handler.settings, "get_render_window", lambda: 3)
+
+    lock = threading.Lock()
+    rendered = []
+    pending = {"now": 0, "peak": 0}
+
+    def handle_post(post):
+        with lock:
+            pending["now"] += 1
+            pending["peak"] = max(pending["peak"], pending["now"])
+        time.sleep(0.005)
+        with lock:
+            pending["now"] -= 1
+            rendered.append(post)
+
+    monkeypatch.setattr(handler, "handle_post", handle_post)
+    handler.create_posts_from_db([list(range(10)), list(range(10, 25))])
+    assert sorted(rendered) == list(range(25))
+    assert pending["peak"] <= 3
+
+
+def test_process_engine_splits_the_window_between_workers():
+    engine = ProcessRenderEngine(4, max_in_flight=256)
+    assert (engine.batch_size, engine.max_batches) == (32, 8)
+    assert ProcessRenderEngine(64, max_in_flight=16).batch_size == 1
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from coeur.apps.ssg.build import BuildHandler
+from conftest import insert_posts
+
+
+def configure(paths: list, link: str, precompress: bool = False):
+    with open("config.toml") as file:
+        config = file.read()
+    config = config.split("[seo_variations]")[0]
+    config += f'[seo_variations]\npaths = {paths!r}\nlink = "{link}"\n\n'
+    config += f'[build]\nrender_backend = "thread"\nprecompress = {str(precompress).lower()}\n'
+    with open("config.toml", "w") as file:
+        file.write(config)
+
+
+@pytest.fixture
+def post(blog):
+    insert_posts(1, [{"uuid": "p", "title": "Linked", "path": "/p/", "date": "2024-01-01"}])
+    return blog / "public"
+
+
+def test_hardlinks_share_the_post_page_and_its_siblings(post):
+    configure(["amp", "lite"], "hardlink", precompress=True)
+    BuildHandler().handler()
+
+    for variation in ("amp", "lite"):
+        for sibling in ("", ".gz"):
+            source = post / "p" / f"index.html{sibling}"
+            link = post / f"p-{variation}" / f"index.html{sibling}"
+            assert os.path.samefile(source, link) and not link.is_symlink()
+
+
+def test_symlinks_point_to_the_post_page_relatively(post):
+    configure(["amp"], "symlink", precompress=True)
+    BuildHandler().handler()
+
+    for sibling in ("", ".gz"):
+        link = post / "p-amp" / f"index.html{sibling}"
+        assert os.readlink(link) == os.path.join("..", "p", f"index.html{sibling}")
+        assert link.read_bytes() == (post / "p" / f"index.html{sibling}").read_bytes()
+
+
+def test_copies_and_the_copy_fallback_of_hardlinks(post, monkeypatch):
+    configure(["amp"], "copy")
+    BuildHandler().handler()
+    copy = post / "p-amp" / "index.html"
+    assert not os.path.samefile(post / "p" / "index.html", copy)
+    assert copy.read_bytes() == (post / "p" / "index.html").read_bytes()
+
+    def no_hardlinks(*args):
+        raise OSError("hard links are not supported")
+
+    monkeypatch.setattr(os, "link", no_hardlinks)
+    configure(["amp"], "hardlink")
+    BuildHandler().handler()
+    copy = post / "p-amp" / "index.html"
+    assert not os.path.samefile(post / "p" / "index.html", copy)
+    assert copy.read_bytes() == (post / "p" / "index.html").read_bytes()
+
+
+def test_changing_links_rebuilds_clean_and_removed_variations_go(post):
+    configure(["amp", "lite"], "hardlink")
+    BuildHandler().handler()
+    (post / "stray.html").write_text("left over")
+
+    configure(["amp"], "symlink")
+    BuildHandler().handler()
+    # a clean output, so no write goes through a hard link of the previous build
+    assert not (post / "stray.html").exists()
+    assert (post / "p-amp" / "index.html").is_symlink()
+    assert not (post / "p-lite").exists()
+
+    configure([], "symlink")
+    BuildHandler().handler()
+    assert not (post / "p-amp").exists()
+    assert (post / "p" / "index.html").exists()
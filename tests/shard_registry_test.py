@@ -0,0 +1,65 @@
+import os
+import sqlite3
+
+from coeur.apps.ssg.db import DatabaseManager, ShardingManager
+
+
+def create_posts(db: DatabaseManager, count: int, size: int):
+    return [
+        db.new_post(
+            title=f"Post {idx}",
+            # words, so the posts_fts index grows the way it does for real posts
+            content="lorem ipsum dolor sit amet " * (size // 27),
+            content_format="html",
+            path=f"/post-{idx}/",
+            extra=None,
+            date="2024-01-01",
+            image=None,
+        )
+        for idx in range(count)
+    ]
+
+
+def test_registry_rolls_over_before_the_shard_overshoots(blog, monkeypatch):
+    # an empty shard already takes 10 pages with the posts_fts tables, the limit leaves room
+    # for a few posts per shard and stays below the 10 shards SQLite can attach
+    monkeypatch.setattr(ShardingManager, "MAX_FILE_SIZE_MB", 0.2)
+    db = DatabaseManager()
+    posts = create_posts(db, 40, 10_000)
+    db.add_posts(posts)
+    db.session.commit()
+    db.session.close()
+
+    shards = sorted(ShardingManager.get_databases())
+    assert len(shards) > 2
+    routed = {filename: 0 for filename in shards}
+    for post in posts:
+        routed[f"db{post.db}.sqlite"] += 1
+    for filename in shards:
+        conn = sqlite3.connect(f"db/{filename}")
+        count = conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        # in WAL mode the last pages stay in the -wal file, the file size misses them
+        size = conn.execute("PRAGMA page_count").fetchone()[0]
+        size *= conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.close()
+        # db1 also holds the welcome post of a new project
+        assert count == routed[filename] + (filename == "db1.sqlite")
+        assert size <= 0.2 * 1024 * 1024
+
+    conn = sqlite3.connect("db/db1.sqlite")
+    registry = {
+        name: (rows, sealed)
+        for name, rows, sealed in conn.execute("SELECT name, rows, sealed FROM shards")
+    }
+    conn.close()
+    assert registry == {
+        filename: (rows + (filename == "db1.sqlite"), filename != shards[-1])
+        for filename, rows in routed.items()
+    }
+
+    db = DatabaseManager()
+    assert db.registry.active == shards[-1]
+    # routing is served from memory, once the registry is loaded
+    monkeypatch.setattr(os, "listdir", None)
+    monkeypatch.setattr(os.path, "getsize", None)
+    assert {post.db for post in create_posts(db, 3, 100)} == {int(shards[-1][2:-7])}
@@ -0,0 +1,47 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from coeur.apps.ssg.build import BuildHandler
+from coeur.apps.ssg.manifest import BuildManifest
+from coeur.apps.ssg.sitemap import SitemapWriter
+from coeur.utils import BuildSettings
+
+
+def write_sitemaps(folder, total, **kwargs):
+    with SitemapWriter(str(folder), BuildManifest(str(folder), "inputs"), **kwargs) as writer:
+        for i in range(total):
+            writer.add(f"https://example.com/posts/{i}/?a=1&b=2", "2024-01-01")
+        return writer.close()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_sitemaps_are_split_by_url_count(tmp_path, compress):
+    filenames = write_sitemaps(tmp_path, 25, max_urls=10, compress=compress)
+    suffix = ".xml.gz" if compress else ".xml"
+    assert filenames == [f"sitemap{i}{suffix}" for i in (1, 2, 3)]
+
+    opener = gzip.open if compress else open
+    with opener(tmp_path / filenames[-1], "rb") as file:
+        content = file.read().decode()
+    assert content.count("<url>") == 5
+    assert content.rstrip().endswith("</urlset>")
+    assert "?a=1&amp;b=2" in content
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_sitemaps_are_split_by_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(SitemapWriter, "MAX_BYTES", 1024)
+    filenames = write_sitemaps(tmp_path, 50, max_urls=1000)
+    assert len(filenames) > 1
+    assert all(os.path.getsize(tmp_path / name) <= 1024 for name in filenames)
+
+
+def test_build_warns_about_an_exported_sitemap_template(blog):
+    shutil.copytree(BuildSettings("./config.toml").template_folder, "templates")
+    with open("templates/sitemap.xml", "w") as file:
+        file.write("<urlset></urlset>")
+    with pytest.warns(UserWarning, match="sitemap.xml is no longer rendered"):
+        BuildHandler(full=True).handler()
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+
+import pytest
+
+from coeur.apps.ssg.build import BuildHandler
+from conftest import insert_posts
+
+
+@pytest.fixture
+def stable_blog(blog):
+    os.makedirs("templates")
+    with open("templates/post.html", "w") as file:
+        file.write("{{ post.title }}")
+    with open("templates/page.html", "w") as file:
+        file.write(
+            "{{ paginator.pages | map(attribute='title') | join(',') }}"
+            "|{{ paginator.navegation.previous }}|{{ paginator.navegation.next }}"
+        )
+    # without the welcome post of a new project, the posts are the ones of the test
+    conn = sqlite3.connect("db/db1.sqlite")
+    conn.execute("DELETE FROM posts")
+    conn.commit()
+    conn.close()
+    return blog
+
+
+def add_posts(start: int, stop: int):
+    insert_posts(
+        1,
+        [
+            {"uuid": f"p{i}", "title": f"p{i}", "path": f"/p{i}/", "date": f"2024-01-{i + 1:02}"}
+            for i in range(start, stop)
+        ],
+    )
+
+
+def build() -> BuildHandler:
+    handler = BuildHandler()
+    handler.settings.posts_pagination = 3
+    # posts rendered in threads, no worker processes to start for a few posts
+    handler.settings.config.setdefault("build", {}).update(
+        pagination="stable", render_backend="thread"
+    )
+    handler.handler()
+    return handler
+
+
+def pages() -> dict:
+    """Rendered listing pages, by path, as (titles, previous, next)."""
+    root = "public"
+    found = {"/index.html": os.path.join(root, "index.html")}
+    if os.path.isdir(os.path.join(root, "page")):
+        for page in os.listdir(os.path.join(root, "page")):
+            found[f"/page/{page}/index.html"] = os.path.join(root, "page", page, "index.html")
+    rendered = {}
+    for path, file_path in found.items():
+        with open(file_path) as file:
+            titles, previous, next_ = file.read().split("|")
+        rendered[path] = (titles.split(",") if titles else [], previous, next_)
+    return rendered
+
+
+def test_fewer_posts_than_a_page(stable_blog):
+    add_posts(0, 2)
+    build()
+    assert pages() == {"/index.html": (["p1", "p0"], "", "")}
+
+
+def test_exact_multiple_of_the_page_size(stable_blog):
+    add_posts(0, 6)
+    build()
+    assert pages() == {
+        "/index.html": (["p5", "p4", "p3"], "", "/page/2"),
+        "/page/2/index.html": (["p5", "p4", "p3"], "/index.html", "/page/1"),
+        "/page/1/index.html": (["p2", "p1", "p0"], "/page/2", ""),
+    }
+
+
+def test_remainder_is_listed_with_the_newest_full_page(stable_blog):
+    add_posts(0, 8)
+    build()
+    assert pages() == {
+        "/index.html": (["p7", "p6", "p5"], "", "/page/2"),
+        "/page/2/index.html": (["p5", "p4", "p3"], "/index.html", "/page/1"),
+        "/page/1/index.html": (["p2", "p1", "p0"], "/page/2", ""),
+    }
+
+
+def test_older_pages_keep_their_digest_when_a_post_is_added(stable_blog):
+    add_posts(0, 6)
+    previous = build().manifest.current["pages"]
+    for total in range(7, 13):
+        add_posts(total - 1, total)
+        current = build().manifest.current["pages"]
+        full_pages = (total - 1) // 3
+        # the newest full page of the previous build may get a link to the page after it
+        for page in range(1, full_pages):
+            path = f"/page/{page}/index.html"
+            assert current[path] == previous[path], (total, path)
+        assert current["/index.html"] != previous["/index.html"]
+        previous = current
+    assert len(pages()) == 5
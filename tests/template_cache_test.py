@@ -0,0 +1,18 @@
+import os
+
+from coeur.utils import BuildSettings
+
+
+def test_settings_share_compiled_templates(blog):
+    first = BuildSettings("./config.toml")
+    second = BuildSettings("./config.toml")
+    assert first.templates["post"] is second.templates["post"]
+    assert os.listdir(os.path.join(first.cache_folder, "jinja"))
+
+    with open("config.toml") as file:
+        config = file.read()
+    with open("config.toml", "w") as file:
+        file.write(config.replace('site_title="My Blog with Coeur"', 'site_title="Changed"'))
+    second.reload()
+    assert second.templates["post"] is not first.templates["post"]
+    assert second.templates["post"].environment.globals["site_title"] == "Changed"
@@ -0,0 +1,58 @@
+from coeur.apps.ssg.graph import TemplateGraph
+
+
+def test_template_graph_follows_extends_and_includes(tmp_path):
+    (tmp_path / "base.html").write_text('{% include "header.html" %}{% block body %}{% endblock %}')
+    (tmp_path / "header.html").write_text("<header></header>")
+    (tmp_path / "post.html").write_text('{% extends "base.html" %}')
+    (tmp_path / "page.html").write_text('{% extends "base.html" %}{% include "page-item.html" %}')
+    (tmp_path / "page-item.html").write_text("<li></li>")
+
+    graph = TemplateGraph(str(tmp_path))
+    assert graph.closure("post.html") == {"post.html", "base.html", "header.html"}
+    assert graph.affected({"post.html", "page.html"}, {"page-item.html"}) == {"page.html"}
+    assert graph.affected({"post.html", "page.html"}, {"header.html"}) == {
+        "post.html",
+        "page.html",
+    }
+
+    post_digest = graph.digest("post.html")
+    (tmp_path / "page-item.html").write_text("<li class='item'></li>")
+    assert graph.digest("post.html") == post_digest
+
+
+def test_template_graph_dynamic_include_depends_on_everything(tmp_path):
+    (tmp_path / "post.html").write_text("{% include name %}")
+    (tmp_path / "other.html").write_text("")
+
+    graph = TemplateGraph(str(tmp_path))
+    assert graph.affected({"post.html"}, {"other.html"}) == {"post.html"}
+
+
+def test_server_observer_queues_changes_saved_during_a_build(tmp_path):
+    import threading
+    import time
+    from types import SimpleNamespace
+
+    from coeur.apps.ssg.build import ServerObserver
+
+    (tmp_path / "post.html").write_text("")
+    builds, running = [], threading.Event()
+
+    def handler(stages):
+        assert not running.is_set(), "two builds ran at once"
+        running.set()
+        time.sleep(0.3)
+        builds.append(stages)
+        running.clear()
+
+    settings = SimpleNamespace(template_folder=str(tmp_path), reload_templates=lambda: None)
+    observer = ServerObserver(SimpleNamespace(settings=settings, handler=handler))
+    observer.DELAY = 0.05
+    event = SimpleNamespace(is_directory=False, src_path=str(tmp_path / "post.html"))
+
+    observer.on_event(event)
+    time.sleep(0.15)
+    observer.on_event(event)
+    time.sleep(0.8)
+    assert builds == [{"posts"}, {"posts"}]